@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def project_test_settings():
+    """Те же настройки, что ``manage.py test`` берёт из TestRunner."""
+    from core.testing import project_test_settings
+
+    with project_test_settings():
+        yield
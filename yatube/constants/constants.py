@@ -1,4 +1,54 @@
 class Constants:
     OUTPUT_OF_POSTS: int = 10
     SUMBOLS_MAX: int = 15
-    CACHE_CLEARING_TIME: int = 20
+    FEED_CACHE_TIME: int = 60 * 60 * 24
+    FEED_REBUILD_LOCK_TIME: int = 10
+    FANOUT_FOLLOWERS_LIMIT: int = 1000
+    TIMELINE_BATCH_SIZE: int = 500
+    POST_CARD_CACHE_TIME: int = 60 * 60 * 24
+    COUNTERS_BATCH_SIZE: int = 1000
+    BACKGROUND_WORKERS: int = 2
+    THUMBNAIL_RETRY_TIME: int = 60 * 10
+    THUMBNAIL_SIZES: dict = {
+        'card': (
+            ('960x339', {'crop': 'center', 'upscale': True, 'format': 'WEBP'}),
+            ('960x339', {'crop': 'center', 'upscale': True}),
+        ),
+    }
+    UPLOAD_MAX_BYTES: int = 5 * 1024 * 1024
+    UPLOAD_MAX_PIXELS: int = 40_000_000
+    UPLOAD_HEADER_BYTES: int = 256 * 1024
+    IMAGE_MAX_SIDE: int = 2560
+    SEARCH_BATCH_SIZE: int = 1000
+    IMPORT_BATCH_SIZE: int = 1000
+    HTTP_CACHE_MAX_AGE: int = 60
+    COMMENTS_PER_PAGE: int = 20
+    METRICS_PREFIX: str = 'yatube'
+    METRICS_TIME_BUCKETS: tuple = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    )
+    METRICS_QUERY_BUCKETS: tuple = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+    SLOW_REQUEST_SECONDS: float = 1.0
+    SLOW_REQUEST_SAMPLE_RATE: float = 1.0
+    REPLICA_PIN_COOKIE: str = 'read_primary'
+    REPLICA_PIN_SECONDS: int = 10
+    SQLITE_WRITE_RETRIES: int = 5
+    SQLITE_RETRY_DELAY: float = 0.05
+    QUERY_WORKERS: int = 4
+    HOT_HALF_LIFE_HOURS: int = 12
+    HOT_WINDOW_DAYS: int = 7
+    HOT_POST_WEIGHT: float = 1.0
+    HOT_COMMENT_WEIGHT: float = 2.0
+    HOT_FOLLOW_WEIGHT: float = 0.5
+    HOT_MIN_WEIGHT: float = 0.01
+    HOT_BATCH_SIZE: int = 1000
+    DEEP_PAGE_OFFSET: int = 500
+    FEED_COUNT_TIME: int = 60 * 60
+    PAGE_WINDOW_SIDE: int = 2
+    BULK_FOLLOW_LIMIT: int = 500
+    FOLLOW_GRAPH_TIME: int = 60 * 60
+    FOLLOW_SUGGESTION_SOURCES: int = 200
+    FOLLOW_SUGGESTIONS: int = 10
+    PROFILE_SUMMARY_TIME: int = 60 * 60
+    FOLLOW_FEED_COUNT_TIME: int = 60
+    UPLOAD_HOLD_TIME: int = 60 * 10
@@ -0,0 +1,223 @@
+"""Двухуровневый кеш: локальный LRU процесса перед общим хранилищем.
+
+Чтение сначала идёт в небольшой LRU в памяти процесса, затем в общий кеш
+(``OPTIONS['SHARED_ALIAS']`` — SQLite, Redis, Memcached и т. п.). Каждая
+запись в общий кеш добавляется в журнал инвалидаций: счётчик
+``<prefix>:seq`` и ключи ``<prefix>:<n>`` с именем изменённого ключа.
+Не чаще раза в ``SYNC_INTERVAL`` секунд процесс дочитывает журнал и
+выбрасывает из LRU чужие изменения, поэтому рассогласование между
+воркерами ограничено этим интервалом и ``LOCAL_TIMEOUT``.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core import metrics
+
+CLEAR_MARKER = '*'
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self._local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', 1000))
+        self._local_timeout = float(options.get('LOCAL_TIMEOUT', 5))
+        self._sync_interval = float(options.get('SYNC_INTERVAL', 0.5))
+        self._journal_prefix = options.get('JOURNAL_PREFIX', 'tiered_journal')
+        self._journal_timeout = int(options.get('JOURNAL_TIMEOUT', 300))
+        self._journal_max_read = int(options.get('JOURNAL_MAX_READ', 500))
+        self._local = OrderedDict()
+        self._lock = threading.RLock()
+        self._seen_seq = None
+        self._own_seqs = set()
+        self._synced_at = 0.0
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    def _count(self, name, value):
+        if value:
+            self.stats[name] += value
+            metrics.incr(f'cache_{name}', value)
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    @property
+    def _seq_key(self):
+        return f'{self._journal_prefix}:seq'
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expires_at(self, timeout):
+        expires = self.get_backend_timeout(timeout)
+        local_expires = time.time() + self._local_timeout
+        if expires is None:
+            return local_expires
+        return min(expires, local_expires)
+
+    def _shared_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    # Локальный уровень.
+
+    def _local_get(self, key):
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.time():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return item
+
+    def _local_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        with self._lock:
+            self._local[key] = (pickle.dumps(value), self._expires_at(timeout))
+            self._local.move_to_end(key)
+            while len(self._local) > self._local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_drop(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    # Журнал инвалидаций.
+
+    def _publish(self, key):
+        shared = self.shared
+        shared.add(self._seq_key, 0, None)
+        try:
+            seq = shared.incr(self._seq_key)
+        except ValueError:
+            # Счётчик вытеснен между add() и incr(): начнём заново.
+            shared.set(self._seq_key, 1, None)
+            seq = 1
+        shared.set(f'{self._journal_prefix}:{seq}', key, self._journal_timeout)
+        with self._lock:
+            self._own_seqs.add(seq)
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self._synced_at < self._sync_interval:
+            return
+        self._synced_at = now
+        current = self.shared.get(self._seq_key, 0)
+        with self._lock:
+            seen, self._seen_seq = self._seen_seq, current
+        if seen is None or current == seen:
+            return
+        if current < seen or current - seen > self._journal_max_read:
+            self._local_clear()
+            return
+        wanted = [
+            f'{self._journal_prefix}:{seq}'
+            for seq in range(seen + 1, current + 1)
+            if seq not in self._own_seqs
+        ]
+        changed = self.shared.get_many(wanted)
+        with self._lock:
+            self._own_seqs = {
+                seq for seq in self._own_seqs if seq > current}
+        if len(changed) < len(wanted) or CLEAR_MARKER in changed.values():
+            # Часть журнала уже истекла: доверять LRU больше нельзя.
+            self._local_clear()
+            return
+        self._local_drop(*changed.values())
+
+    def _local_clear(self):
+        with self._lock:
+            self._local.clear()
+
+    # API кеша Django.
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        self._sync()
+        item = self._local_get(key)
+        if item is not None:
+            self._count('local_hits', 1)
+            return pickle.loads(item[0])
+        value = self.shared.get(key)
+        if value is None:
+            self._count('misses', 1)
+            return default
+        self._count('shared_hits', 1)
+        self._local_set(key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        made = {self._key(key, version): key for key in keys}
+        found, missing = {}, []
+        for key in made:
+            item = self._local_get(key)
+            if item is None:
+                missing.append(key)
+            else:
+                found[made[key]] = pickle.loads(item[0])
+        self._count('local_hits', len(found))
+        if missing:
+            shared = self.shared.get_many(missing)
+            self._count('shared_hits', len(shared))
+            self._count('misses', len(missing) - len(shared))
+            for key, value in shared.items():
+                self._local_set(key, value)
+                found[made[key]] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self.shared.set(key, value, self._shared_timeout(timeout))
+        self._local_set(key, value, timeout)
+        self._publish(key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        if not self.shared.add(key, value, self._shared_timeout(timeout)):
+            return False
+        self._local_set(key, value, timeout)
+        self._publish(key)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._local_drop(key)
+        return self.shared.touch(key, self._shared_timeout(timeout))
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        self.shared.delete(key)
+        self._local_drop(key)
+        self._publish(key)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        self._local_drop(key)
+        value = self.shared.incr(key, delta)
+        self._publish(key)
+        return value
+
+    def has_key(self, key, version=None):
+        return self.get(key, version=version) is not None
+
+    def clear(self):
+        # Счётчик журнала сохраняем, иначе другие воркеры не заметят сброса.
+        seq = self.shared.get(self._seq_key, 0)
+        self.shared.clear()
+        self.shared.set(self._seq_key, seq, None)
+        self._local_clear()
+        self._publish(CLEAR_MARKER)
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
@@ -0,0 +1,83 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики перечислены в ``settings.DATABASE_REPLICAS``. Чтение уходит на
+реплику только внутри запроса (``routing``), и только пока
+запрос ничего не записал: после первой записи и в транзакциях чтение
+идёт в основную базу. ``ReplicaPinMiddleware`` после записи ставит
+пользователю короткую cookie, и его следующие запросы тоже читают с
+основной базы — так он сразу видит свой пост или подписку, даже если
+реплика отстаёт.
+
+Реплика выбирается случайно один раз на запрос: все его чтения идут на
+неё, поэтому, например, COUNT(*) и строки страницы не расходятся из-за
+разного отставания реплик.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = contextvars.ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self, pinned=False, replica=None):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = replica
+
+
+@contextmanager
+def routing(pinned=False):
+    """Разрешает чтение с реплик в пределах блока (обычно — запроса)."""
+    aliases = replicas()
+    state = RoutingState(pinned, random.choice(aliases) if aliases else None)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Читает внутри блока только с основной базы."""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    pinned, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = pinned
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None or state.pinned or state.replica is None
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему реплики получают вместе с данными при репликации.
+        return db not in replicas()
@@ -0,0 +1,117 @@
+import itertools
+import json
+import multiprocessing
+import random
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core.metrics import percentile
+
+
+def run_worker(alias, options, seed, results):
+    """Поток запросов одного воркера: чтение, промах -> запись, инвалидации."""
+    cache = caches[alias]
+    rnd = random.Random(seed)
+    keys = [f'bench:{number}' for number in range(options['keys'])]
+    weights = list(itertools.accumulate(
+        1 / (rank + 1) ** options['skew'] for rank in range(len(keys))))
+    payload = b'x' * options['payload']
+    hits = misses = 0
+    latencies = []
+    for _ in range(options['ops']):
+        key = rnd.choices(keys, cum_weights=weights)[0]
+        started = time.perf_counter()
+        if rnd.random() < options['write_ratio']:
+            cache.delete(key)
+        elif cache.get(key) is None:
+            misses += 1
+            cache.set(key, payload, options['timeout'])
+        else:
+            hits += 1
+        latencies.append((time.perf_counter() - started) * 1e6)
+    stats = getattr(cache, 'stats', {})
+    results.put({
+        'hits': hits,
+        'misses': misses,
+        'local_hits': stats.get('local_hits', 0),
+        'latencies': latencies,
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест кеша: доля попаданий и задержки при N воркерах. '
+        'Для общего уровня в SQLite запускайте с SHARED_CACHE_LOCATION.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--aliases', nargs='+', default=['default', 'shared'],
+            help='Алиасы CACHES для сравнения.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--ops', type=int, default=5000)
+        parser.add_argument('--keys', type=int, default=500)
+        parser.add_argument('--skew', type=float, default=1.1)
+        parser.add_argument('--payload', type=int, default=8192)
+        parser.add_argument('--write-ratio', type=float, default=0.01)
+        parser.add_argument('--timeout', type=int, default=300)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        report = []
+        for alias in options['aliases']:
+            caches[alias].clear()
+            results = context.Queue()
+            workers = [
+                context.Process(
+                    target=run_worker,
+                    args=(alias, options, seed, results),
+                )
+                for seed in range(options['workers'])
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            collected = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+            latencies = list(itertools.chain.from_iterable(
+                item['latencies'] for item in collected))
+            hits = sum(item['hits'] for item in collected)
+            misses = sum(item['misses'] for item in collected)
+            reads = hits + misses
+            report.append({
+                'alias': alias,
+                'backend': type(caches[alias]).__name__,
+                'workers': options['workers'],
+                'ops': len(latencies),
+                'ops_per_sec': round(len(latencies) / elapsed),
+                'hit_ratio': round(hits / reads, 4) if reads else 0.0,
+                'local_hit_ratio': round(
+                    sum(item['local_hits'] for item in collected) / reads, 4
+                ) if reads else 0.0,
+                'latency_us': {
+                    'mean': round(statistics.mean(latencies), 1),
+                    'p50': round(percentile(latencies, 0.50), 1),
+                    'p95': round(percentile(latencies, 0.95), 1),
+                    'p99': round(percentile(latencies, 0.99), 1),
+                },
+            })
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for row in report:
+            latency = row['latency_us']
+            self.stdout.write(
+                f"{row['alias']:>10} {row['backend']:<14} "
+                f"workers={row['workers']} ops/s={row['ops_per_sec']} "
+                f"hit={row['hit_ratio']:.2%} "
+                f"local={row['local_hit_ratio']:.2%} "
+                f"p50={latency['p50']}us p95={latency['p95']}us "
+                f"p99={latency['p99']}us"
+            )
@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.metrics import percentile
+from core.sqlite import is_locked_error, pragma_statements, retry_delays
+
+SCHEMA = (
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, author INTEGER, text TEXT)',
+    'CREATE TABLE counters (author INTEGER PRIMARY KEY, posts INTEGER)',
+)
+
+
+def write_post(connection, author):
+    """Запись как у post_create: чтение, вставка и счётчик в транзакции."""
+    connection.execute('BEGIN')
+    try:
+        connection.execute(
+            'SELECT count(*) FROM post WHERE author = ?', (author,))
+        connection.execute(
+            'INSERT INTO post (author, text) VALUES (?, ?)',
+            (author, 'x' * 200),
+        )
+        connection.execute(
+            'UPDATE counters SET posts = posts + 1 WHERE author = ?',
+            (author,),
+        )
+    except Exception:
+        connection.execute('ROLLBACK')
+        raise
+    connection.execute('COMMIT')
+
+
+def read_feed(connection):
+    connection.execute(
+        'SELECT id, author, text FROM post ORDER BY id DESC LIMIT 10'
+    ).fetchall()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает конкурентную запись в SQLite с настройками по '
+        'умолчанию и с профилем production (PRAGMA и повтор при '
+        'блокировке).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--json', action='store_true')
+
+    def profiles(self):
+        return {
+            'baseline': {'pragmas': {}, 'retry': False},
+            'tuned': {
+                'pragmas': settings.SQLITE_PROFILES['production']['pragmas'],
+                'retry': True,
+            },
+        }
+
+    def connect(self, path, profile):
+        connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False)
+        for statement in pragma_statements(profile['pragmas']):
+            connection.execute(statement)
+        return connection
+
+    def writer(self, path, profile, number, deadline, stats):
+        connection = self.connect(path, profile)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            delays = retry_delays() if profile['retry'] else iter(())
+            while True:
+                try:
+                    write_post(connection, number)
+                except sqlite3.OperationalError as error:
+                    if not is_locked_error(error):
+                        raise
+                    delay = next(delays, None)
+                    if delay is None:
+                        stats['errors'] += 1
+                        break
+                    time.sleep(delay)
+                else:
+                    stats['writes'] += 1
+                    stats['latencies'].append(
+                        (time.perf_counter() - started) * 1000)
+                    break
+        connection.close()
+
+    def reader(self, path, profile, deadline, stats):
+        connection = self.connect(path, profile)
+        while time.perf_counter() < deadline:
+            try:
+                read_feed(connection)
+            except sqlite3.OperationalError as error:
+                if not is_locked_error(error):
+                    raise
+                stats['read_errors'] += 1
+            else:
+                stats['reads'] += 1
+        connection.close()
+
+    def run(self, directory, name, profile, options):
+        path = os.path.join(directory, f'{name}.sqlite3')
+        connection = self.connect(path, profile)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.executemany(
+            'INSERT INTO counters VALUES (?, 0)',
+            [(number,) for number in range(options['writers'])],
+        )
+        connection.close()
+        # У каждого потока свои счётчики: складываем после завершения.
+        shards = [
+            {'writes': 0, 'errors': 0, 'reads': 0, 'read_errors': 0,
+             'latencies': []}
+            for _ in range(options['writers'] + options['readers'])
+        ]
+        deadline = time.perf_counter() + options['seconds']
+        threads = [
+            threading.Thread(
+                target=self.writer,
+                args=(path, profile, number, deadline, shards[number]))
+            for number in range(options['writers'])
+        ] + [
+            threading.Thread(
+                target=self.reader,
+                args=(path, profile, deadline, shards[-number - 1]))
+            for number in range(options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        latencies = [value for shard in shards for value in shard.pop(
+            'latencies')]
+        stats = {
+            key: sum(shard[key] for shard in shards) for key in shards[0]}
+        return {
+            'profile': name,
+            'writes_per_second': round(stats['writes'] / options['seconds']),
+            'reads_per_second': round(stats['reads'] / options['seconds']),
+            'write_errors': stats['errors'],
+            'read_errors': stats['read_errors'],
+            'write_p95_ms': round(percentile(latencies, 0.95), 2),
+        }
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        try:
+            results = [
+                self.run(directory, name, profile, options)
+                for name, profile in self.profiles().items()
+            ]
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for row in results:
+            self.stdout.write(
+                f"{row['profile']:>8}: запись {row['writes_per_second']}/с "
+                f"(ошибок {row['write_errors']}, p95 "
+                f"{row['write_p95_ms']} мс), чтение "
+                f"{row['reads_per_second']}/с "
+                f"(ошибок {row['read_errors']})"
+            )
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.replication import replicate
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite во все реплики из '
+        'DATABASE_REPLICAS — один раз или с заданным интервалом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пауза между копиями в секундах; 0 — скопировать один раз.')
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Команда работает только с SQLite.')
+        targets = [
+            settings.DATABASES[alias]['NAME']
+            for alias in settings.DATABASE_REPLICAS
+        ]
+        if not targets:
+            raise CommandError('Реплики не настроены (SQLITE_REPLICAS).')
+        while True:
+            started = time.perf_counter()
+            for target in targets:
+                pages = replicate(primary['NAME'], target)
+            self.stdout.write(
+                f'{len(targets)} реплик, {pages} страниц, '
+                f'{time.perf_counter() - started:.3f} с'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
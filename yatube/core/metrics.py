@@ -0,0 +1,141 @@
+"""Счётчики и гистограммы процесса для мониторинга.
+
+Значения живут в памяти процесса, каждый воркер отдаёт свои — Prometheus
+складывает их по меткам ``instance``. Пока идёт запрос (``track_request``),
+всё, что прибавляется через ``incr`` и ``track_time``, попадает ещё и в
+запись этого запроса: из неё middleware строит метрики по представлениям.
+"""
+import contextvars
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from constants.constants import Constants
+
+_lock = threading.Lock()
+_counters = Counter()
+_histograms = {}
+_request = contextvars.ContextVar('metrics_request', default=None)
+
+
+def _key(name, labels):
+    if not labels:
+        return name
+    return name, tuple(sorted(labels.items()))
+
+
+def incr(name, value=1, **labels):
+    with _lock:
+        _counters[_key(name, labels)] += value
+    record = _request.get()
+    if record is not None and not labels:
+        record[name] += value
+
+
+def snapshot():
+    with _lock:
+        return dict(_counters)
+
+
+def observe(name, value, buckets=None, **labels):
+    """Добавляет наблюдение в гистограмму с границами buckets."""
+    buckets = buckets or Constants.METRICS_TIME_BUCKETS
+    with _lock:
+        histogram = _histograms.setdefault(
+            _key(name, labels),
+            {'buckets': buckets, 'counts': [0] * len(buckets),
+             'sum': 0.0, 'count': 0},
+        )
+        for index, bound in enumerate(histogram['buckets']):
+            if value <= bound:
+                histogram['counts'][index] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+@contextmanager
+def track_request():
+    """Собирает счётчики и время, накопленные за время запроса."""
+    record = Counter()
+    token = _request.set(record)
+    try:
+        yield record
+    finally:
+        _request.reset(token)
+
+
+@contextmanager
+def track_time(name):
+    """Прибавляет время блока к записи запроса; вложенные блоки не
+    считаются повторно."""
+    record = _request.get()
+    if record is None or record[f'{name}:active']:
+        yield
+        return
+    record[f'{name}:active'] = 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record[name] += time.perf_counter() - started
+        record[f'{name}:active'] = 0
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        (label, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for label, value in pairs
+    )
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+def _split(key):
+    return (key, ()) if isinstance(key, str) else key
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+    prefix = Constants.METRICS_PREFIX
+    with _lock:
+        counters = sorted(_counters.items(), key=lambda item: str(item[0]))
+        histograms = sorted(
+            ((key, dict(value, counts=list(value['counts'])))
+             for key, value in _histograms.items()),
+            key=lambda item: str(item[0]),
+        )
+    lines, typed = [], set()
+    for key, value in counters:
+        name, labels = _split(key)
+        metric = f'{prefix}_{name}_total'
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric}{_labels(labels)} {value}')
+    for key, histogram in histograms:
+        name, labels = _split(key)
+        metric = f'{prefix}_{name}'
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f'# TYPE {metric} histogram')
+        for bound, count in zip(histogram['buckets'], histogram['counts']):
+            lines.append(
+                f'{metric}_bucket{_labels(labels, le=bound)} {count}')
+        lines.append(
+            f'{metric}_bucket{_labels(labels, le="+Inf")} '
+            f'{histogram["count"]}'
+        )
+        lines.append(f'{metric}_sum{_labels(labels)} {histogram["sum"]}')
+        lines.append(f'{metric}_count{_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * share))
+    return ordered[index]
@@ -0,0 +1,126 @@
+"""Middleware ядра: метрики запросов и выбор базы для чтения.
+
+Метрики запросов: время, SQL, шаблоны и кеш по представлениям.
+
+``MetricsMiddleware`` оборачивает обработку запроса: через
+``execute_wrapper`` засекает каждый SQL-запрос всех подключений,
+собирает время рендеринга шаблонов и попадания в кеш из
+``core.metrics.track_request`` и складывает всё в гистограммы с меткой
+представления. Медленные запросы вместе со списком SQL пишутся в лог
+``yatube.slow_requests`` (в настройках — ротируемый файл).
+"""
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from constants.constants import Constants
+from core import db_router, metrics
+
+logger = logging.getLogger('yatube.slow_requests')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper: запоминает SQL, параметры и длительность."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': repr(params)[:200],
+                'seconds': time.perf_counter() - started,
+            })
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or 'unresolved'
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorders = [QueryRecorder(alias) for alias in connections]
+        started = time.perf_counter()
+        with metrics.track_request() as record, ExitStack() as stack:
+            for recorder in recorders:
+                stack.enter_context(
+                    connections[recorder.alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        queries = [query for rec in recorders for query in rec.queries]
+        self.record(request, response, elapsed, queries, record)
+        return response
+
+    def record(self, request, response, elapsed, queries, record):
+        view = view_name(request)
+        sql_seconds = sum(query['seconds'] for query in queries)
+        metrics.observe('request_seconds', elapsed, view=view)
+        metrics.observe('request_sql_seconds', sql_seconds, view=view)
+        metrics.observe(
+            'request_queries', len(queries),
+            buckets=Constants.METRICS_QUERY_BUCKETS, view=view,
+        )
+        metrics.observe(
+            'request_template_seconds', record['template_seconds'],
+            view=view,
+        )
+        metrics.incr(
+            'requests', view=view, status=response.status_code // 100 * 100)
+        for name in ('local_hits', 'shared_hits', 'misses'):
+            if record[f'cache_{name}']:
+                metrics.incr(
+                    f'view_cache_{name}', record[f'cache_{name}'], view=view)
+        if (
+            elapsed >= Constants.SLOW_REQUEST_SECONDS
+            and random.random() < Constants.SLOW_REQUEST_SAMPLE_RATE
+        ):
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.3f с, SQL %d за %.3f с\n%s',
+                request.method, request.get_full_path(), view, elapsed,
+                len(queries), sql_seconds,
+                '\n'.join(
+                    f"  {query['seconds']:.4f} с [{query['alias']}] "
+                    f"{query['sql']} {query['params']}"
+                    for query in queries
+                ),
+                extra={'queries': queries},
+            )
+
+
+class ReplicaPinMiddleware:
+    """Читает с реплик, но после записи пользователя — с основной базы."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in SAFE_METHODS
+            or Constants.REPLICA_PIN_COOKIE in request.COOKIES
+        )
+        with db_router.routing(pinned) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            response.set_cookie(
+                Constants.REPLICA_PIN_COOKIE, '1',
+                max_age=Constants.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,81 @@
+"""Параллельное выполнение независимых запросов одного представления.
+
+``run_parallel`` раздаёт вызовы ограниченному пулу потоков и возвращает
+их результаты по порядку. У каждого потока пула свои соединения с базой;
+перед задачей и после неё устаревшие соединения закрываются, как между
+запросами. Задача видит контекст вызвавшего потока (выбор реплики,
+метрики запроса) и его обёртки ``execute_wrapper``.
+
+Вызовы выполняются по очереди в текущем потоке, если параллельность
+выключена (``settings.PARALLEL_QUERIES``), если открыта транзакция — её
+данные другим соединениям не видны, — и внутри самой задачи пула, чтобы
+вложенные вызовы не ждали занятый пул.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from constants.constants import Constants
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=Constants.QUERY_WORKERS,
+                thread_name_prefix='queries',
+            )
+    return _executor
+
+
+def _close_obsolete():
+    for connection in connections.all():
+        connection.close_if_unusable_or_obsolete()
+
+
+def _is_serial():
+    return (
+        not getattr(settings, 'PARALLEL_QUERIES', False)
+        or getattr(_local, 'in_pool', False)
+        or any(connection.in_atomic_block for connection in connections.all())
+    )
+
+
+def _run(context, wrappers, call):
+    _local.in_pool = True
+    _close_obsolete()
+    try:
+        with ExitStack() as stack:
+            for alias, alias_wrappers in wrappers.items():
+                for wrapper in alias_wrappers:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(wrapper))
+            return context.run(call)
+    finally:
+        _close_obsolete()
+        _local.in_pool = False
+
+
+def run_parallel(*calls):
+    """Результаты вызовов calls (без аргументов) в том же порядке."""
+    if len(calls) < 2 or _is_serial():
+        return [call() for call in calls]
+    wrappers = {
+        connection.alias: list(connection.execute_wrappers)
+        for connection in connections.all()
+    }
+    executor = _get_executor()
+    futures = [
+        executor.submit(_run, contextvars.copy_context(), wrappers, call)
+        for call in calls
+    ]
+    return [future.result() for future in futures]
@@ -0,0 +1,20 @@
+"""Замена репликации для локальной проверки: копии файла SQLite.
+
+``replicate`` переносит основную базу в файл реплики через backup API
+SQLite: копия согласованна, а читатели реплики на время копирования
+ждут блокировку и видят либо старое, либо новое состояние целиком.
+"""
+import sqlite3
+from contextlib import closing
+
+
+def replicate(source, target, pages=-1):
+    """Копирует базу source в target, возвращает число страниц."""
+    # with у соединения sqlite3 только коммитит, но не закрывает его.
+    with closing(sqlite3.connect(source)) as primary:
+        replica = sqlite3.connect(target, timeout=30)
+        try:
+            primary.backup(replica, pages=pages)
+            return primary.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            replica.close()
@@ -0,0 +1,59 @@
+"""Настройка соединений SQLite и повтор записи при блокировке базы.
+
+PRAGMA из ``settings.SQLITE_PRAGMAS`` выполняются на каждом новом
+соединении (сигнал ``connection_created``). ``retry_on_locked`` повторяет
+представление целиком в транзакции, если запись упёрлась в
+``database is locked``: незавершённая попытка откатывается, так что
+повтор не задвоит пост или комментарий.
+"""
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+from constants.constants import Constants
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked')
+
+
+def is_locked_error(error):
+    return any(message in str(error) for message in LOCKED_MESSAGES)
+
+
+def pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
+
+
+def retry_delays():
+    """Паузы перед повторами: экспонента с разбросом."""
+    for attempt in range(Constants.SQLITE_WRITE_RETRIES):
+        delay = Constants.SQLITE_RETRY_DELAY * 2 ** attempt
+        yield delay * random.uniform(0.5, 1.5)
+
+
+def retry_on_locked(view):
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        for delay in retry_delays():
+            try:
+                with transaction.atomic():
+                    return view(request, *args, **kwargs)
+            except OperationalError as error:
+                outer = transaction.get_connection().in_atomic_block
+                if outer or not is_locked_error(error):
+                    raise
+            time.sleep(delay)
+        with transaction.atomic():
+            return view(request, *args, **kwargs)
+    return wrapper
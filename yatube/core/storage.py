@@ -0,0 +1,91 @@
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from constants.constants import Constants
+
+HOLD_KEY = 'storage_hold:{}'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы хранятся под sha256 содержимого: ``<каталог>/<ab>/<sha>.<ext>``.
+
+    Одинаковые загрузки ложатся в один файл на диске. Поэтому файл может
+    понадобиться записи, которая ещё не закоммичена: каждое сохранение
+    держит файл (``hold``), пока вызывающий код его не отпустит
+    (``release``), и ``delete_unused`` такой файл не удаляет.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        name = posixpath.join(
+            posixpath.dirname(name), digest[:2], digest + extension)
+        # Держим файл до проверки: иначе delete_unused мог бы удалить его
+        # между этой проверкой и коммитом ссылающейся записи.
+        self.hold(name)
+        if self.exists(name):
+            return name
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Пишем во временный файл и подменяем: одновременная загрузка того
+        # же содержимого перезапишет файл идентичными байтами.
+        temp_path = f'{full_path}.{uuid.uuid4().hex}.tmp'
+        content.seek(0)
+        with open(temp_path, 'wb') as file:
+            for chunk in content.chunks():
+                file.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(temp_path, self.file_permissions_mode)
+        os.replace(temp_path, full_path)
+        return name
+
+    def hold(self, name):
+        key = HOLD_KEY.format(name)
+        cache.add(key, 0, Constants.UPLOAD_HOLD_TIME)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, Constants.UPLOAD_HOLD_TIME)
+
+    def release(self, name):
+        """Отпускает файл после коммита записи, которая на него ссылается.
+
+        Неотпущенный файл (например, после отката) освобождается через
+        ``Constants.UPLOAD_HOLD_TIME``.
+        """
+        try:
+            cache.decr(HOLD_KEY.format(name))
+        except ValueError:
+            pass
+
+    def delete_unused(self, name, in_use):
+        """Удаляет файл, если его никто не держит и in_use() ложно.
+
+        Файл сначала убирается в сторону: сохранение того же содержимого,
+        начатое после этого, запишет его заново, а начатое раньше уже
+        держит файл, и он возвращается на место.
+        """
+        path = self.path(name)
+        aside = f'{path}.{uuid.uuid4().hex}.deleted'
+        try:
+            os.replace(path, aside)
+        except FileNotFoundError:
+            return False
+        if cache.get(HOLD_KEY.format(name), 0) <= 0 and not in_use():
+            os.remove(aside)
+            return True
+        os.replace(aside, path)
+        return False
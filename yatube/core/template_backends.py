@@ -0,0 +1,19 @@
+"""Шаблоны Django с замером времени рендеринга для метрик запроса."""
+from django.template.backends.django import DjangoTemplates, Template
+
+from core import metrics
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with metrics.track_time('template_seconds'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
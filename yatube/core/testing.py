@@ -0,0 +1,32 @@
+"""Настройки тестового прогона поверх основных.
+
+Общий уровень кеша в тестах живёт в памяти процесса: файл SQLite пережил
+бы прогон и отдал следующему чужие ключи. Фоновые задачи выполняются
+сразу: поток пула не должен писать в тестовую базу, пока её очищают между
+тестами. ``TestRunner`` включает эти настройки для ``manage.py test``,
+корневой ``conftest.py`` — для pytest.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def project_test_settings():
+    caches = dict(settings.CACHES)
+    caches['shared'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+    return override_settings(CACHES=caches, BACKGROUND_TASKS_EAGER=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = project_test_settings()
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.cache_backends.tiered import TieredCache
+
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'test_shared': {
+        'BACKEND': 'core.cache_backends.sqlite.SQLiteCache',
+        'LOCATION': os.path.join(TEMP_CACHE_DIR, 'cache.sqlite3'),
+    },
+})
+class TieredCacheTest(SimpleTestCase):
+    """Два экземпляра TieredCache изображают два процесса-воркера."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.shared = caches['test_shared']
+        self.shared.clear()
+        options = {'SHARED_ALIAS': 'test_shared', 'SYNC_INTERVAL': 0}
+        self.worker_a = TieredCache('', {'OPTIONS': options})
+        self.worker_b = TieredCache('', {'OPTIONS': options})
+
+    def test_sqlite_add_and_incr_are_atomic(self):
+        """add не перезаписывает живой ключ, incr увеличивает значение."""
+        self.assertTrue(self.shared.add('counter', 1))
+        self.assertFalse(self.shared.add('counter', 5))
+        self.assertEqual(self.shared.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.shared.incr('missing')
+
+    def test_local_hit_after_shared_read(self):
+        """Повторное чтение обслуживается локальным LRU."""
+        self.worker_a.set('key', 'value')
+        self.assertEqual(self.worker_b.get('key'), 'value')
+        self.assertEqual(self.worker_b.get('key'), 'value')
+        self.assertEqual(self.worker_b.stats['shared_hits'], 1)
+        self.assertEqual(self.worker_b.stats['local_hits'], 1)
+
+    def test_invalidation_crosses_workers(self):
+        """Запись одного воркера вытесняет значение из LRU другого."""
+        self.worker_a.set('key', 'old')
+        self.assertEqual(self.worker_b.get('key'), 'old')
+        self.worker_a.set('key', 'new')
+        self.assertEqual(self.worker_b.get('key'), 'new')
+        self.worker_a.delete('key')
+        self.assertIsNone(self.worker_b.get('key'))
+
+    def test_clear_crosses_workers(self):
+        """clear() на одном воркере очищает LRU остальных."""
+        self.worker_a.set('key', 'value')
+        self.worker_b.get('key')
+        self.worker_a.clear()
+        self.assertIsNone(self.worker_b.get('key'))
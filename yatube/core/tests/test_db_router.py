@@ -0,0 +1,113 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from constants.constants import Constants
+from core import db_router
+from core.replication import replicate
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRouterTest(SimpleTestCase):
+    """Чтение с реплик в запросе, запись и транзакции — в основную базу."""
+
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+
+    def test_reads_outside_request_use_primary(self):
+        """Команды и фоновые задачи читают с основной базы."""
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_write_pins_rest_of_request(self):
+        """После записи запрос дочитывает с основной базы."""
+        with db_router.routing() as state:
+            self.assertEqual(self.router.db_for_read(User), 'replica_1')
+            self.assertEqual(self.router.db_for_write(User), 'default')
+            self.assertTrue(state.wrote)
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[f'replica_{n}' for n in range(8)])
+    def test_one_replica_per_request(self):
+        """Все чтения запроса идут на одну и ту же реплику."""
+        with db_router.routing() as state:
+            aliases = {self.router.db_for_read(User) for _ in range(50)}
+        self.assertEqual(aliases, {state.replica})
+
+    def test_use_primary_block(self):
+        """use_primary временно закрепляет чтение за основной базой."""
+        with db_router.routing():
+            with db_router.use_primary():
+                self.assertEqual(self.router.db_for_read(User), 'default')
+            self.assertEqual(self.router.db_for_read(User), 'replica_1')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica_1', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+
+class ReplicaPinMiddlewareTest(TestCase):
+    """После записи пользователь какое-то время читает с основной базы."""
+
+    def test_write_sets_pin_cookie(self):
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        self.client.force_login(reader)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(Constants.REPLICA_PIN_COOKIE, response.cookies)
+        response = self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': author}))
+        cookie = response.cookies[Constants.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], Constants.REPLICA_PIN_SECONDS)
+
+
+class ReplicationTest(SimpleTestCase):
+    """Копия базы через backup API видна в файле реплики целиком."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_replicate_copies_data(self):
+        source = os.path.join(self.directory, 'primary.sqlite3')
+        target = os.path.join(self.directory, 'replica.sqlite3')
+        with closing(sqlite3.connect(source)) as primary, primary:
+            primary.execute('CREATE TABLE item (name TEXT)')
+            primary.execute("INSERT INTO item VALUES ('первый')")
+        replicate(source, target)
+        with closing(sqlite3.connect(source)) as primary, primary:
+            primary.execute("INSERT INTO item VALUES ('второй')")
+        replica = sqlite3.connect(target)
+        self.addCleanup(replica.close)
+        self.assertEqual(
+            replica.execute('SELECT count(*) FROM item').fetchone()[0], 1)
+        replicate(source, target)
+        self.assertEqual(
+            replica.execute('SELECT count(*) FROM item').fetchone()[0], 2)
+
+    def test_replicate_closes_connections(self):
+        """После копии не остаётся открытых соединений с базами."""
+        source = os.path.join(self.directory, 'primary.sqlite3')
+        target = os.path.join(self.directory, 'replica.sqlite3')
+        opened = []
+        real_connect = sqlite3.connect
+
+        def connect(*args, **kwargs):
+            connection = real_connect(*args, **kwargs)
+            opened.append(connection)
+            return connection
+
+        with mock.patch('core.replication.sqlite3.connect', connect):
+            replicate(source, target)
+        self.assertEqual(len(opened), 2)
+        for connection in opened:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connection.execute('SELECT 1')
@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from constants.constants import Constants
+from core import metrics
+
+User = get_user_model()
+
+
+class MetricsMiddlewareTest(TestCase):
+    """Метрики запросов по представлениям и эндпоинт /metrics/."""
+
+    def setUp(self):
+        cache.clear()
+
+    def histogram(self, name, view):
+        return metrics._histograms[(name, (('view', view),))]
+
+    def test_request_is_measured_per_view(self):
+        """Запрос попадает в гистограммы времени, SQL и шаблонов."""
+        before = metrics._histograms.get(
+            ('request_seconds', (('view', 'posts:index'),)),
+            {'count': 0},
+        )['count']
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            self.histogram('request_seconds', 'posts:index')['count'],
+            before + 1,
+        )
+        self.assertGreater(
+            self.histogram('request_queries', 'posts:index')['sum'], 0)
+        self.assertGreater(
+            self.histogram('request_template_seconds', 'posts:index')['sum'],
+            0,
+        )
+
+    def test_track_time_skips_nested_blocks(self):
+        """Вложенный рендеринг не удваивает время шаблонов."""
+        with metrics.track_request() as record:
+            with metrics.track_time('work'):
+                with metrics.track_time('work'):
+                    pass
+                outer = record['work']
+        self.assertEqual(outer, 0)
+        self.assertGreater(record['work'], 0)
+
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        """/metrics/ отдаёт счётчики и гистограммы в формате Prometheus."""
+        self.client.get(reverse('posts:index'))
+        with override_settings(METRICS_TOKEN='secret'):
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('# TYPE yatube_request_seconds histogram', text)
+        self.assertIn(
+            'yatube_request_seconds_bucket{view="posts:index",le="+Inf"}',
+            text,
+        )
+        self.assertIn('yatube_requests_total{', text)
+
+    def test_metrics_endpoint_is_internal(self):
+        """Без токена эндпоинт не виден даже с локального адреса
+        (за прокси), персоналу и доверенным адресам — виден."""
+        self.assertEqual(
+            self.client.get(reverse('metrics')).status_code, 404)
+        with override_settings(METRICS_TOKEN='secret'):
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 404)
+        client = Client(REMOTE_ADDR='203.0.113.5')
+        with override_settings(METRICS_ALLOWED_IPS=['203.0.113.5']):
+            self.assertEqual(client.get(reverse('metrics')).status_code, 200)
+        self.assertEqual(client.get(reverse('metrics')).status_code, 404)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client.force_login(staff)
+        self.assertEqual(client.get(reverse('metrics')).status_code, 200)
+
+    def test_slow_request_is_logged_with_queries(self):
+        """Медленный запрос пишется в лог вместе со списком SQL."""
+        with mock.patch.object(Constants, 'SLOW_REQUEST_SECONDS', 0):
+            with self.assertLogs('yatube.slow_requests') as logs:
+                self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
@@ -0,0 +1,53 @@
+import contextvars
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.parallel import run_parallel
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+marker = contextvars.ContextVar('marker', default=None)
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+@override_settings(PARALLEL_QUERIES=True)
+class RunParallelTest(TransactionTestCase):
+    """Независимые вызовы идут в пул, в транзакции — по очереди."""
+
+    def test_results_keep_order_and_context(self):
+        marker.set('запрос')
+        results = run_parallel(
+            lambda: (thread_name(), marker.get()),
+            lambda: User.objects.count(),
+        )
+        self.assertTrue(results[0][0].startswith('queries'))
+        self.assertEqual(results[0][1], 'запрос')
+        self.assertEqual(results[1], 0)
+
+    def test_serial_inside_transaction(self):
+        with transaction.atomic():
+            names = run_parallel(thread_name, thread_name)
+        self.assertEqual(names, [thread_name()] * 2)
+
+    def test_views_render_with_parallel_queries(self):
+        """Профиль и пост собираются из результатов потоков пула."""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(author=author, text='Параллельный пост')
+        self.client.force_login(reader)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': author}))
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['page_obj'][0], post)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertEqual(response.context['post'], post)
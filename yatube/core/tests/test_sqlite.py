@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+
+from core.sqlite import retry_on_locked
+
+
+class SQLiteTuningTest(TransactionTestCase):
+    """PRAGMA профиля на соединении и повтор записи при блокировке."""
+
+    def test_pragmas_applied_to_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                settings.SQLITE_PRAGMAS['busy_timeout'],
+            )
+
+    @mock.patch('core.sqlite.time.sleep')
+    def test_locked_write_is_retried(self, sleep):
+        """Заблокированная запись повторяется, прочие ошибки — нет."""
+        view = mock.Mock(side_effect=[
+            OperationalError('database is locked'), HttpResponse('ok')])
+        request = RequestFactory().post('/')
+        response = retry_on_locked(view)(request)
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(view.call_count, 2)
+        sleep.assert_called_once()
+        view = mock.Mock(side_effect=OperationalError('no such table'))
+        with self.assertRaises(OperationalError):
+            retry_on_locked(view)(request)
+        self.assertEqual(view.call_count, 1)
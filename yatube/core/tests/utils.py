@@ -0,0 +1,20 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """Выполняет колбэки ``on_commit``, отложенные внутри блока.
+
+    ``TestCase`` держит каждый тест в транзакции и никогда её не
+    коммитит, поэтому без этого отложенные действия в тестах не видны.
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    while len(connection.run_on_commit) > start:
+        callbacks = connection.run_on_commit[start:]
+        del connection.run_on_commit[start:]
+        for _, callback in callbacks:
+            callback()
@@ -0,0 +1,68 @@
+from io import BytesIO
+
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from PIL import Image
+
+from constants.constants import Constants
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """Отсекает слишком большие файлы и картинки, пока они ещё читаются.
+
+    Стоит первым в ``FILE_UPLOAD_HANDLERS``: пропускает данные дальше по
+    цепочке, считая байты, а по началу файла узнаёт размеры картинки.
+    Отброшенный файл не попадает в ``request.FILES``, а причина
+    сохраняется в ``request.upload_errors`` для формы.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        self.header = b''
+        self.header_checked = False
+        if (self.content_length or 0) > Constants.UPLOAD_MAX_BYTES:
+            self.reject(self.size_message())
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > Constants.UPLOAD_MAX_BYTES:
+            self.reject(self.size_message())
+        if not self.header_checked:
+            self.header += raw_data
+            self.check_pixels()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def check_pixels(self):
+        try:
+            image = Image.open(BytesIO(self.header))
+        except Image.DecompressionBombError:
+            self.reject(self.pixels_message())
+        except Exception:
+            # Заголовок ещё не дочитан или это не картинка: проверку
+            # формата оставляем форме.
+            if len(self.header) >= Constants.UPLOAD_HEADER_BYTES:
+                self.header_checked = True
+                self.header = b''
+            return
+        self.header_checked = True
+        self.header = b''
+        width, height = image.size
+        if width * height > Constants.UPLOAD_MAX_PIXELS:
+            self.reject(self.pixels_message())
+
+    def size_message(self):
+        megabytes = Constants.UPLOAD_MAX_BYTES // (1024 * 1024)
+        return f'Файл больше {megabytes} МБ.'
+
+    def pixels_message(self):
+        megapixels = Constants.UPLOAD_MAX_PIXELS // 1_000_000
+        return f'Изображение больше {megapixels} мегапикселей.'
+
+    def reject(self, message):
+        errors = getattr(self.request, 'upload_errors', {})
+        errors[self.field_name] = message
+        self.request.upload_errors = errors
+        raise SkipFile(message)
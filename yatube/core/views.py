@@ -1,5 +1,11 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from core import metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +17,22 @@ def csrf_failure(request, reason=''):
 
 def access_denied(request):
     return render(request, 'core/500csrf.html', status=500)
+
+
+def _has_metrics_token(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+def metrics_view(request):
+    """Метрики процесса для Prometheus; остальным — 404."""
+    allowed = (
+        request.user.is_staff
+        or _has_metrics_token(request)
+        or request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    )
+    if not allowed:
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4')
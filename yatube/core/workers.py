@@ -0,0 +1,54 @@
+"""Общий пул фоновых задач процесса.
+
+Задачи ставятся в очередь по ключу: пока задача с тем же ключом ждёт или
+выполняется, повторная не добавляется. После задачи поток закрывает свои
+соединения с базой. С ``settings.BACKGROUND_TASKS_EAGER`` задача
+выполняется сразу в вызывающем потоке.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from constants.constants import Constants
+
+logger = logging.getLogger(__name__)
+
+_pending = set()
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=Constants.BACKGROUND_WORKERS,
+            thread_name_prefix='background',
+        )
+    return _executor
+
+
+def _run(key, task, args):
+    try:
+        task(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s упала', key)
+    finally:
+        with _lock:
+            _pending.discard(key)
+        connections.close_all()
+
+
+def submit(key, task, *args):
+    """Ставит task(*args) в пул, если задачи с таким ключом ещё нет."""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        task(*args)
+        return
+    with _lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    _get_executor().submit(_run, key, task, args)
@@ -0,0 +1,290 @@
+"""Массовая загрузка и выгрузка постов, комментариев, групп и подписок.
+
+Строки читаются и пишутся потоком (JSON Lines или CSV), поэтому память не
+растёт с размером файла. Авторы и группы ссылаются на естественные ключи
+(username и slug) и разрешаются в id через кеш в памяти, который
+дозаполняется одним запросом на пачку. Посты и комментарии сохраняют свои
+id, так что повторный импорт того же файла ничего не дублирует.
+
+``bulk_create`` не шлёт сигналов, поэтому то, что обычно делают
+сигналы, импорт делает сам: индексирует тексты, а в конце сверяет
+счётчики, пересобирает ленты подписок и сбрасывает кеш лент.
+"""
+import csv
+import json
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed_counts, follow_graph, search, timeline
+from .caching import GLOBAL_SCOPE, bump_feeds
+from .models import Comment, Follow, Group, Post, User
+
+FORMATS = ('jsonl', 'csv')
+
+FIELDS = {
+    'group': ('id', 'slug', 'title', 'description'),
+    'post': ('id', 'text', 'pub_date', 'author', 'group', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+    'follow': ('id', 'user', 'author'),
+}
+
+EXPORTS = {
+    'group': (Group, ('pk', 'slug', 'title', 'description')),
+    'post': (Post, (
+        'pk', 'text', 'pub_date', 'author__username', 'group__slug', 'image',
+    )),
+    'comment': (Comment, (
+        'pk', 'post_id', 'author__username', 'text', 'created',
+    )),
+    'follow': (Follow, ('pk', 'user__username', 'author__username')),
+}
+
+
+def _to_text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_rows(model, after_pk=0, chunk_size=1000):
+    """Строки модели по возрастанию pk, начиная после after_pk."""
+    model_class, values = EXPORTS[model]
+    rows = model_class.objects.filter(pk__gt=after_pk).order_by(
+        'pk').values_list(*values)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(FIELDS[model], map(_to_text, row)))
+
+
+def write_rows(rows, stream, file_format, model, header=True):
+    """Пишет строки в поток и отдаёт их дальше, например для счётчика."""
+    if file_format == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=FIELDS[model])
+        if header:
+            writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row):
+            stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+    for row in rows:
+        write(row)
+        yield row
+
+
+def read_rows(stream, file_format):
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _datetime(value):
+    moment = parse_datetime(value) if value else None
+    if moment is None:
+        return timezone.now()
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+class keep_dates:
+    """Отключает auto_now/auto_now_add, чтобы сохранить даты из файла."""
+
+    FLAGS = ('auto_now', 'auto_now_add')
+
+    def __init__(self, *fields):
+        self.fields = fields
+        self.saved = []
+
+    def __enter__(self):
+        for field in self.fields:
+            self.saved.append(
+                {flag: getattr(field, flag) for flag in self.FLAGS})
+            for flag in self.FLAGS:
+                setattr(field, flag, False)
+
+    def __exit__(self, *exc_info):
+        for field, flags in zip(self.fields, self.saved):
+            for flag, value in flags.items():
+                setattr(field, flag, value)
+
+
+class Importer:
+    def __init__(self, model, create_users=False):
+        self.model = model
+        self.create_users = create_users
+        self.users = {}
+        self.groups = {}
+        self.posts = set()
+        self.reindex_all = False
+        self.skipped = 0
+        self.touched_users = set()
+        self.touched_posts = set()
+        self.touched_groups = set()
+        self.timeline_users = set()
+
+    def resolve_users(self, usernames):
+        missing = set(usernames) - set(self.users) - {''}
+        if not missing:
+            return
+        self.users.update(User.objects.filter(
+            username__in=missing).values_list('username', 'pk'))
+        missing -= set(self.users)
+        if missing and self.create_users:
+            User.objects.bulk_create(
+                [
+                    User(username=username, password=make_password(None))
+                    for username in missing
+                ],
+                ignore_conflicts=True,
+            )
+            created = dict(User.objects.filter(
+                username__in=missing).values_list('username', 'pk'))
+            self.users.update(created)
+            # Счётчики новым пользователям заведёт сверка в finish().
+            self.touched_users.update(created.values())
+
+    def resolve_groups(self, slugs):
+        missing = set(slugs) - set(self.groups) - {''}
+        if missing:
+            self.groups.update(Group.objects.filter(
+                slug__in=missing).values_list('slug', 'pk'))
+
+    def resolve_posts(self, post_ids):
+        missing = {int(post_id) for post_id in post_ids if post_id}
+        missing -= self.posts
+        if missing:
+            self.posts.update(Post.objects.filter(
+                pk__in=missing).values_list('pk', flat=True))
+
+    def build_group(self, row):
+        return Group(
+            slug=row['slug'],
+            title=row['title'],
+            description=row.get('description', ''),
+        )
+
+    def build_post(self, row):
+        author_id = self.users.get(row['author'])
+        if author_id is None:
+            return None
+        if not row.get('id'):
+            # Без id bulk_create на SQLite не вернёт pk: индекс пересоберём.
+            self.reindex_all = True
+        pub_date = _datetime(row.get('pub_date'))
+        group_id = self.groups.get(row.get('group') or '')
+        self.touched_users.add(author_id)
+        if group_id is not None:
+            self.touched_groups.add(group_id)
+        return Post(
+            id=int(row['id']) if row.get('id') else None,
+            text=row['text'],
+            pub_date=pub_date,
+            updated=pub_date,
+            author_id=author_id,
+            group_id=group_id,
+            image=row.get('image') or '',
+        )
+
+    def build_comment(self, row):
+        author_id = self.users.get(row['author'])
+        post_id = int(row['post']) if row.get('post') else None
+        if author_id is None or post_id not in self.posts:
+            return None
+        self.touched_posts.add(post_id)
+        return Comment(
+            id=int(row['id']) if row.get('id') else None,
+            post_id=post_id,
+            author_id=author_id,
+            text=row['text'],
+            created=_datetime(row.get('created')),
+        )
+
+    def build_follow(self, row):
+        user_id = self.users.get(row['user'])
+        author_id = self.users.get(row['author'])
+        if user_id is None or author_id is None or user_id == author_id:
+            return None
+        self.touched_users.update((user_id, author_id))
+        self.timeline_users.add(user_id)
+        return Follow(user_id=user_id, author_id=author_id)
+
+    def import_batch(self, rows):
+        """Сохраняет пачку строк одной транзакцией, возвращает их число."""
+        self.resolve_users(
+            row[key] for row in rows for key in ('author', 'user')
+            if key in row
+        )
+        self.resolve_groups(row.get('group') or '' for row in rows)
+        if self.model == 'comment':
+            self.resolve_posts(row.get('post') for row in rows)
+        build = getattr(self, f'build_{self.model}')
+        objects = []
+        for row in rows:
+            obj = build(row)
+            if obj is None:
+                self.skipped += 1
+            else:
+                objects.append(obj)
+        model_class = type(objects[0]) if objects else None
+        with transaction.atomic(), keep_dates(
+                Post._meta.get_field('pub_date'),
+                Post._meta.get_field('updated'),
+                Comment._meta.get_field('created')):
+            if model_class is not None:
+                model_class.objects.bulk_create(
+                    objects, ignore_conflicts=True)
+            if self.model == 'post':
+                # Индексируем то, что лежит в базе: строки с уже занятым id
+                # bulk_create пропустил.
+                search.index_posts(Post.objects.filter(pk__in=[
+                    post.pk for post in objects if post.pk is not None
+                ]).values_list('pk', 'text'))
+        return len(rows)
+
+    def finish(self, batch_size):
+        """Доделывает то, что при обычной записи делают сигналы."""
+        if self.model == 'post':
+            self.timeline_users.update(Follow.objects.filter(
+                author_id__in=self.touched_users
+            ).values_list('user_id', flat=True))
+        for ids in batches(sorted(self.touched_users), batch_size):
+            with transaction.atomic():
+                counters.reconcile_users(ids)
+        for ids in batches(sorted(self.touched_posts), batch_size):
+            with transaction.atomic():
+                counters.reconcile_posts(ids)
+        for ids in batches(sorted(self.touched_groups), batch_size):
+            with transaction.atomic():
+                counters.reconcile_groups(ids)
+        for user_id in sorted(self.timeline_users):
+            with transaction.atomic():
+                timeline.rebuild_timeline(user_id)
+        if self.reindex_all and search.is_supported():
+            search.clear_index()
+            for ids in counters.id_batches(Post, batch_size):
+                with transaction.atomic():
+                    search.index_posts(Post.objects.filter(
+                        pk__in=ids).values_list('pk', 'text'))
+        if self.model == 'follow':
+            follow_graph.forget(*self.touched_users)
+        feed_counts.forget('index', *(
+            f'follow:{user_id}' for user_id in self.timeline_users))
+        bump_feeds(GLOBAL_SCOPE)
@@ -0,0 +1,214 @@
+"""Кеш страниц лент с версиями и инвалидацией по событиям.
+
+Каждая лента (``index``, ``group:<pk>``, ``profile:<pk>``) имеет токен
+версии. Сигналы моделей меняют токен, и закешированная страница со старой
+версией считается устаревшей. Страница хранится долго
+(``Constants.FEED_CACHE_TIME``), а пересобирает её только один воркер:
+остальные, пока держится блокировка, отдают предыдущую версию.
+
+Карточки постов кешируются отдельными фрагментами по ключу из id поста
+и времени его последней правки, поэтому страница собирается из готового
+HTML даже после сброса версии ленты.
+
+Токены версий начинаются со времени сброса, поэтому из них же получаются
+ETag и Last-Modified: неизменившаяся страница отвечает 304 без запросов
+к базе за лентой.
+"""
+import hashlib
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from constants.constants import Constants
+from core.db_router import use_primary
+
+VERSION_KEY = 'feed_version:{}'
+POST_CARD_KEY = 'post_card:{}:{}'
+POST_AUTHOR_KEY = 'post_author:{}'
+PAGE_KEY = 'feed_page:{}:{}:{}'
+LOCK_KEY = 'feed_lock:{}'
+GLOBAL_SCOPE = 'feeds'
+
+
+def _token():
+    return f'{int(time.time())}.{uuid.uuid4().hex}'
+
+
+def feed_versions(*scopes):
+    """Текущие токены версий лент; недостающие создаются."""
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            token = _token()
+            if not cache.add(key, token, None):
+                token = cache.get(key, token)
+            versions[key] = token
+    return ':'.join(versions[key] for key in keys)
+
+
+def bump_feeds(*scopes):
+    """Делает устаревшими закешированные страницы перечисленных лент.
+
+    Внутри транзакции версии меняются только после коммита: иначе
+    параллельный запрос собрал бы страницу по ещё старым данным и
+    сохранил её под новой версией.
+    """
+    transaction.on_commit(lambda: cache.set_many(
+        {VERSION_KEY.format(scope): _token() for scope in scopes},
+        None,
+    ))
+
+
+def post_scopes(author_id, *group_ids):
+    scopes = ['index', 'hot', f'profile:{author_id}']
+    scopes.extend(
+        f'group:{group_id}' for group_id in group_ids if group_id is not None)
+    return scopes
+
+
+def modified_at(version):
+    """Время последнего сброса лент по строке их версий или None."""
+    stamps = [token.split('.')[0] for token in version.split(':')]
+    return max(
+        (int(stamp) for stamp in stamps if stamp.isdigit()), default=None)
+
+
+def _viewer(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anon'
+    # Ключ сессии меняется при входе вместе с токеном CSRF: копия
+    # страницы со старой формой не будет подтверждена.
+    return f'{user.pk}:{request.session.session_key}'
+
+
+def _render_fresh(last_modified, render_page):
+    """Рендерит страницу; сразу после сброса версии — с основной базы.
+
+    Иначе отстающая реплика дала бы старое содержимое, и оно осталось бы
+    в кеше и у клиентов под новой версией.
+    """
+    recent = time.time() - Constants.REPLICA_PIN_SECONDS
+    if last_modified is not None and last_modified >= recent:
+        with use_primary():
+            return render_page()
+    return render_page()
+
+
+def conditional_page(request, version, render_page):
+    """Отвечает 304, если копия клиента не устарела, иначе рендерит страницу.
+
+    Анонимам страница отдаётся как публичная на
+    ``Constants.HTTP_CACHE_MAX_AGE`` секунд, вошедшим — как личная,
+    с обязательной перепроверкой.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return render_page()
+    etag = '"{}"'.format(hashlib.md5(
+        f'{version}:{_viewer(request)}:{request.get_full_path()}'.encode()
+    ).hexdigest())
+    last_modified = modified_at(version)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _render_fresh(last_modified, render_page)
+    if response.status_code not in (200, 304):
+        return response
+    if getattr(request, 'skip_page_cache', False):
+        patch_cache_control(response, no_cache=True)
+        return response
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=Constants.HTTP_CACHE_MAX_AGE)
+    return response
+
+
+def _page_key(request, scope):
+    user = request.user
+    viewer = user.pk if user.is_authenticated else 'anon'
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(scope, viewer, path)
+
+
+def skip_page_cache(request):
+    """Не кешировать страницу этого запроса: в ней временное содержимое."""
+    if request is not None:
+        request.skip_page_cache = True
+
+
+def _from_cache(entry):
+    return HttpResponse(entry['content'], content_type=entry['content_type'])
+
+
+def cached_feed(request, scope, render_page):
+    """Отдаёт страницу ленты из кеша или пересобирает её через render_page."""
+    if request.method != 'GET':
+        return render_page()
+    version = feed_versions(scope, GLOBAL_SCOPE)
+    return conditional_page(
+        request, version,
+        lambda: _cached_page(request, scope, version, render_page),
+    )
+
+
+def _cached_page(request, scope, version, render_page):
+    key = _page_key(request, scope)
+    entry = cache.get(key)
+    if entry is not None and entry['version'] == version:
+        return _from_cache(entry)
+    lock_key = LOCK_KEY.format(key)
+    locked = cache.add(lock_key, True, Constants.FEED_REBUILD_LOCK_TIME)
+    if entry is not None and not locked:
+        return _from_cache(entry)
+    try:
+        response = render_page()
+        skipped = getattr(request, 'skip_page_cache', False)
+        if response.status_code == 200 and not skipped:
+            cache.set(key, {
+                'version': version,
+                'content': response.content,
+                'content_type': response['Content-Type'],
+            }, Constants.FEED_CACHE_TIME)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return response
+
+
+def cached_post_author(post_id):
+    """id автора поста из кеша или None.
+
+    Автор у поста не меняется, поэтому версия страницы поста, а с ней и
+    ответ 304, получаются без запросов к базе.
+    """
+    return cache.get(POST_AUTHOR_KEY.format(post_id))
+
+
+def remember_post_author(post):
+    cache.set(
+        POST_AUTHOR_KEY.format(post.pk), post.author_id,
+        Constants.FEED_CACHE_TIME,
+    )
+    return post.author_id
+
+
+def post_card_key(post):
+    """Ключ фрагмента карточки: id поста и время его последней правки."""
+    return POST_CARD_KEY.format(post.pk, post.updated.timestamp())
+
+
+def invalidate_post_card(post, updated=None):
+    """Удаляет карточку поста; updated — время правки прежней версии."""
+    updated = updated or post.updated
+    cache.delete(POST_CARD_KEY.format(post.pk, updated.timestamp()))
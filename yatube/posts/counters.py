@@ -0,0 +1,117 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются одним ``UPDATE ... SET x = x + 1`` в сигналах моделей,
+поэтому учитываются и записи, созданные мимо вьюх. Если счётчики всё же
+разошлись с данными (ручные правки в базе, ``bulk_create``, сбой между
+запросами), их сверяет команда ``reconcile_counters``.
+"""
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from . import profiles
+from .models import Comment, Follow, Group, Post, UserCounters
+
+
+def _shift(field, delta):
+    return Greatest(F(field) + delta, 0)
+
+
+def ensure_counters(user_id):
+    UserCounters.objects.get_or_create(user_id=user_id)
+
+
+def change_user_counters(user_id, **deltas):
+    """Атомарно сдвигает счётчики пользователя: posts_count=1 и т. п."""
+    UserCounters.objects.filter(user_id=user_id).update(**{
+        field: _shift(field, delta) for field, delta in deltas.items()
+    })
+    profiles.invalidate(user_id)
+
+
+def change_comments_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=_shift('comments_count', delta))
+
+
+def change_group_posts_count(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=_shift('posts_count', delta))
+
+
+def _grouped(queryset, field, ids):
+    return dict(
+        queryset.filter(**{f'{field}__in': ids})
+        .values_list(field)
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+
+
+def reconcile_users(user_ids):
+    """Пересчитывает счётчики пачки пользователей, возвращает число правок."""
+    posts = _grouped(Post.objects, 'author_id', user_ids)
+    followers = _grouped(Follow.objects, 'author_id', user_ids)
+    following = _grouped(Follow.objects, 'user_id', user_ids)
+    existing = UserCounters.objects.in_bulk(user_ids)
+    missing, drifted = [], []
+    for user_id in user_ids:
+        actual = {
+            'posts_count': posts.get(user_id, 0),
+            'followers_count': followers.get(user_id, 0),
+            'following_count': following.get(user_id, 0),
+        }
+        counters = existing.get(user_id)
+        if counters is None:
+            missing.append(UserCounters(user_id=user_id, **actual))
+        elif any(getattr(counters, field) != value
+                 for field, value in actual.items()):
+            for field, value in actual.items():
+                setattr(counters, field, value)
+            drifted.append(counters)
+    UserCounters.objects.bulk_create(missing, ignore_conflicts=True)
+    UserCounters.objects.bulk_update(
+        drifted, ['posts_count', 'followers_count', 'following_count'])
+    profiles.invalidate(*(counters.user_id for counters in missing + drifted))
+    return len(missing) + len(drifted)
+
+
+def reconcile_posts(post_ids):
+    """Пересчитывает comments_count пачки постов, возвращает число правок."""
+    comments = _grouped(Comment.objects, 'post_id', post_ids)
+    drifted = []
+    for post in Post.objects.filter(pk__in=post_ids).only('comments_count'):
+        actual = comments.get(post.pk, 0)
+        if post.comments_count != actual:
+            post.comments_count = actual
+            drifted.append(post)
+    Post.objects.bulk_update(drifted, ['comments_count'])
+    return len(drifted)
+
+
+def reconcile_groups(group_ids):
+    """Пересчитывает posts_count пачки групп, возвращает число правок."""
+    posts = _grouped(Post.objects, 'group_id', group_ids)
+    drifted = []
+    for group in Group.objects.filter(pk__in=group_ids).only('posts_count'):
+        actual = posts.get(group.pk, 0)
+        if group.posts_count != actual:
+            group.posts_count = actual
+            drifted.append(group)
+    Group.objects.bulk_update(drifted, ['posts_count'])
+    return len(drifted)
+
+
+def id_batches(model, batch_size):
+    """Первичные ключи модели пачками по возрастанию, без OFFSET."""
+    last_pk = 0
+    while True:
+        ids = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_pk = ids[-1]
@@ -0,0 +1,50 @@
+"""Приблизительные размеры лент для постраничной навигации.
+
+Точный COUNT(*) по большой ленте дорог, а номерам страниц хватает
+приблизительного числа. Размер ленты хранится в кеше под её именем:
+сигналы сдвигают его при создании и удалении постов, периодические
+задачи сбрасывают, а через ``Constants.FEED_COUNT_TIME`` он считается
+заново. Размеры лент подписок (``follow:<id>``) живут короче, до
+``Constants.FOLLOW_FEED_COUNT_TIME``: посты авторов, которых читают при
+запросе, их не сдвигают. Если число всё же отстало от базы,
+``FeedPaginator`` поправляет его по выбранным строкам и записывает обратно.
+"""
+from django.core.cache import cache
+
+from constants.constants import Constants
+
+COUNT_KEY = 'feed_count:{}'
+FOLLOW_PREFIX = 'follow:'
+
+
+def _timeout(name):
+    if name.startswith(FOLLOW_PREFIX):
+        return Constants.FOLLOW_FEED_COUNT_TIME
+    return Constants.FEED_COUNT_TIME
+
+
+def feed_count(name, queryset):
+    """Размер ленты из кеша; при промахе — COUNT(*) по queryset."""
+    key = COUNT_KEY.format(name)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.values('pk').order_by().count()
+        cache.add(key, count, _timeout(name))
+    return count
+
+
+def store(name, count):
+    cache.set(COUNT_KEY.format(name), count, _timeout(name))
+
+
+def shift(delta, *names):
+    """Сдвигает закешированные размеры; отсутствующие не создаются."""
+    for name in names:
+        try:
+            cache.incr(COUNT_KEY.format(name), delta)
+        except ValueError:
+            pass
+
+
+def forget(*names):
+    cache.delete_many([COUNT_KEY.format(name) for name in names])
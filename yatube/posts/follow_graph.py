@@ -0,0 +1,146 @@
+"""Граф подписок в кеше: компактные массивы id для каждого пользователя.
+
+Для пользователя хранятся два отсортированных массива ``array('I')``: на
+кого он подписан и кто подписан на него. Связь занимает 4 байта, массив
+лежит в кеше как bytes, поэтому проверка подписки — это чтение из
+локального LRU и двоичный поиск. Промахи догружаются одним запросом на
+пачку пользователей.
+
+Сигналы ``Follow`` правят закешированные массивы на месте, массовые
+изменения сбрасывают их через ``forget``. Через
+``Constants.FOLLOW_GRAPH_TIME`` массивы перечитываются из базы, так что
+правка, потерянная при гонке двух воркеров, живёт недолго.
+"""
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+from constants.constants import Constants
+from .models import Follow
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+GRAPH_KEY = 'follow_graph:{}:{}'
+COLUMNS = {
+    FOLLOWING: ('user_id', 'author_id'),
+    FOLLOWERS: ('author_id', 'user_id'),
+}
+
+
+def _key(direction, user_id):
+    return GRAPH_KEY.format(direction, user_id)
+
+
+def _unpack(raw):
+    neighbours = array('I')
+    neighbours.frombytes(raw)
+    return neighbours
+
+
+def _store(direction, arrays):
+    cache.set_many(
+        {
+            _key(direction, user_id): neighbours.tobytes()
+            for user_id, neighbours in arrays.items()
+        },
+        Constants.FOLLOW_GRAPH_TIME,
+    )
+
+
+def _load(direction, user_ids):
+    source, target = COLUMNS[direction]
+    edges = defaultdict(list)
+    rows = Follow.objects.filter(
+        **{f'{source}__in': user_ids}).values_list(source, target)
+    for user_id, neighbour in rows.iterator():
+        edges[user_id].append(neighbour)
+    return {
+        user_id: array('I', sorted(edges[user_id])) for user_id in user_ids
+    }
+
+
+def adjacency(direction, user_ids):
+    """Соседи пачки пользователей: ``{id: array('I')}``."""
+    keys = {_key(direction, user_id): user_id for user_id in user_ids}
+    result = {
+        keys[key]: _unpack(raw) for key, raw in cache.get_many(keys).items()
+    }
+    missing = [user_id for user_id in user_ids if user_id not in result]
+    if missing:
+        loaded = _load(direction, missing)
+        _store(direction, loaded)
+        result.update(loaded)
+    return result
+
+
+def following(user_id):
+    return adjacency(FOLLOWING, [user_id])[user_id]
+
+
+def followers(user_id):
+    return adjacency(FOLLOWERS, [user_id])[user_id]
+
+
+def _contains(neighbours, user_id):
+    index = bisect_left(neighbours, user_id)
+    return index < len(neighbours) and neighbours[index] == user_id
+
+
+def is_following(user_id, author_id):
+    return _contains(following(user_id), author_id)
+
+
+def _update(direction, user_id, changed, add):
+    """Правит закешированный массив; отсутствующий не создаётся."""
+    raw = cache.get(_key(direction, user_id))
+    if raw is None:
+        return
+    current = set(_unpack(raw))
+    updated = current | changed if add else current - changed
+    if updated != current:
+        _store(direction, {user_id: array('I', sorted(updated))})
+
+
+def add_edges(user_id, author_ids):
+    """Учитывает подписки user_id на author_ids."""
+    _update(FOLLOWING, user_id, set(author_ids), add=True)
+    for author_id in author_ids:
+        _update(FOLLOWERS, author_id, {user_id}, add=True)
+
+
+def remove_edges(user_id, author_ids):
+    """Учитывает отписки user_id от author_ids."""
+    _update(FOLLOWING, user_id, set(author_ids), add=False)
+    for author_id in author_ids:
+        _update(FOLLOWERS, author_id, {user_id}, add=False)
+
+
+def forget(*user_ids):
+    cache.delete_many([
+        _key(direction, user_id)
+        for direction in COLUMNS for user_id in user_ids
+    ])
+
+
+def suggestions(user_id, limit=None):
+    """Друзья друзей: пары (автор, число общих подписок) по убыванию.
+
+    Голосуют те, на кого подписан user_id (не больше
+    ``Constants.FOLLOW_SUGGESTION_SOURCES``); сам пользователь и его
+    подписки из выдачи исключаются.
+    """
+    followed = following(user_id)
+    sources = list(followed[:Constants.FOLLOW_SUGGESTION_SOURCES])
+    votes = Counter()
+    for neighbours in adjacency(FOLLOWING, sources).values():
+        votes.update(neighbours)
+    ranked = sorted(
+        (
+            (author_id, mutual) for author_id, mutual in votes.items()
+            if author_id != user_id and not _contains(followed, author_id)
+        ),
+        key=lambda item: (-item[1], item[0]),
+    )
+    return ranked[:limit]
@@ -0,0 +1,108 @@
+"""Массовые подписки и отписки по списку имён.
+
+Авторы разрешаются одним запросом, подписки создаются одним
+``bulk_create(ignore_conflicts=True)`` — повторы отсекает ограничение
+``unique_user_author``, — а отписки удаляются одним ``DELETE ... IN``.
+Сигналов на каждую подписку при этом нет, поэтому их работу делает
+``_apply`` пачкой: сверяет счётчики, правит материализованную ленту и
+сбрасывает кеш лент. Граф подписок в кеше правится после коммита.
+"""
+from django.db import connections, router, transaction
+
+from . import counters, feed_counts, follow_graph, timeline
+from .caching import bump_feeds
+from .models import Follow, User
+
+FOLLOWED = 'followed'
+UNFOLLOWED = 'unfollowed'
+ALREADY_FOLLOWING = 'already_following'
+NOT_FOLLOWING = 'not_following'
+NOT_FOUND = 'not_found'
+SELF = 'self'
+
+
+def _resolve(usernames):
+    return dict(User.objects.filter(
+        username__in=set(usernames)).values_list('username', 'pk'))
+
+
+def _followed(user_id, author_ids):
+    return set(Follow.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).values_list('author_id', flat=True))
+
+
+def _delete_follows(user_id, author_ids):
+    """Удаляет подписки одним DELETE, без post_delete на каждую строку."""
+    connection = connections[router.db_for_write(Follow)]
+    quote = connection.ops.quote_name
+    meta = Follow._meta
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(meta.db_table)} '
+            f'WHERE {quote(meta.get_field("user").column)} = %s '
+            f'AND {quote(meta.get_field("author").column)} '
+            f'IN ({placeholders})',
+            [user_id, *author_ids],
+        )
+
+
+def _apply(user_id, author_ids):
+    """Делает то, что при одиночной подписке делают сигналы Follow."""
+    counters.reconcile_users([user_id, *sorted(author_ids)])
+    feed_counts.forget(f'follow:{user_id}')
+    bump_feeds(*(f'profile:{author_id}' for author_id in author_ids))
+
+
+def _results(usernames, authors, user_id, changed, done, unchanged):
+    results = {}
+    for username in usernames:
+        author_id = authors.get(username)
+        if author_id is None:
+            results[username] = NOT_FOUND
+        elif author_id == user_id:
+            results[username] = SELF
+        else:
+            results[username] = done if author_id in changed else unchanged
+    return results
+
+
+def follow_many(user, usernames):
+    """Подписывает user на авторов; возвращает итог по каждому имени."""
+    usernames = list(dict.fromkeys(usernames))
+    authors = _resolve(usernames)
+    author_ids = set(authors.values()) - {user.pk}
+    with transaction.atomic():
+        created = author_ids - _followed(user.pk, author_ids)
+        Follow.objects.bulk_create(
+            [Follow(user_id=user.pk, author_id=pk) for pk in created],
+            ignore_conflicts=True,
+        )
+        if created:
+            # Сначала счётчики: по ним лента выбирает авторов для раскладки.
+            _apply(user.pk, created)
+            timeline.backfill_authors(user.pk, created)
+            transaction.on_commit(
+                lambda: follow_graph.add_edges(user.pk, created))
+    return _results(
+        usernames, authors, user.pk, created, FOLLOWED, ALREADY_FOLLOWING)
+
+
+def unfollow_many(user, usernames):
+    """Отписывает user от авторов; возвращает итог по каждому имени."""
+    usernames = list(dict.fromkeys(usernames))
+    authors = _resolve(usernames)
+    author_ids = set(authors.values()) - {user.pk}
+    with transaction.atomic():
+        removed = _followed(user.pk, author_ids)
+        if removed:
+            # QuerySet.delete() разослал бы post_delete по каждой строке;
+            # на Follow никто не ссылается, так что хватает одного DELETE.
+            _delete_follows(user.pk, sorted(removed))
+            _apply(user.pk, removed)
+            timeline.trim_authors(user.pk, removed)
+            transaction.on_commit(
+                lambda: follow_graph.remove_edges(user.pk, removed))
+    return _results(
+        usernames, authors, user.pk, removed, UNFOLLOWED, NOT_FOLLOWING)
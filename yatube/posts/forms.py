@@ -1,6 +1,9 @@
+from django import forms
 from django.forms import ModelForm
 
-from posts.models import Comment, Post
+from constants.constants import Constants
+from posts import uploads
+from posts.models import Comment, Group, Post, User
 
 
 class PostForm(ModelForm):
@@ -16,6 +19,23 @@ class PostForm(ModelForm):
         }
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, message in self.upload_errors.items():
+            if field in self.fields:
+                self.add_error(field, message)
+        return cleaned_data
+
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit and 'image' in self.changed_data and post.image:
+            uploads.enqueue(post.image.name)
+        return post
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -24,3 +44,36 @@ class CommentForm(ModelForm):
             'text': 'Текст комментария',
         }
         fields = ('text',)
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Запрос', max_length=200, required=False)
+    group = forms.ModelChoiceField(
+        label='Группа',
+        queryset=Group.objects.all(),
+        to_field_name='slug',
+        required=False,
+    )
+    author = forms.CharField(label='Автор', max_length=150, required=False)
+
+    def clean_author(self):
+        username = self.cleaned_data['author']
+        if not username:
+            return None
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise forms.ValidationError('Нет такого автора.')
+        return author
+
+
+class BulkFollowForm(forms.Form):
+    usernames = forms.CharField(label='Авторы', widget=forms.Textarea)
+    unfollow = forms.BooleanField(label='Отписаться', required=False)
+
+    def clean_usernames(self):
+        usernames = list(dict.fromkeys(
+            self.cleaned_data['usernames'].replace(',', ' ').split()))
+        if len(usernames) > Constants.BULK_FOLLOW_LIMIT:
+            raise forms.ValidationError(
+                f'Не больше {Constants.BULK_FOLLOW_LIMIT} авторов за раз.')
+        return usernames
@@ -0,0 +1,163 @@
+"""Рейтинг «горячих» постов.
+
+Балл поста — сумма весов событий (публикация, комментарии, новые
+подписчики автора), каждый из которых затухает вдвое за
+``Constants.HOT_HALF_LIFE_HOURS``. Чтобы не пересчитывать затухание
+старых баллов, событие в момент t получает вес
+``w * 2 ** ((t - EPOCH) / half_life)``: порядок постов от этого не
+меняется. В ``HotPost.score`` лежит log2 суммы — так числа не
+переполняются.
+
+``update`` (команда ``update_hot_posts``, запускается по расписанию)
+учитывает только события после водяных знаков — последних обработанных
+id постов, комментариев и подписок — и удаляет посты, чей балл затух
+ниже ``Constants.HOT_MIN_WEIGHT``.
+"""
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from django.utils import timezone as django_timezone
+
+from constants.constants import Constants
+from . import feed_counts
+from .bulk_io import batches
+from .caching import bump_feeds
+from .models import Comment, Follow, HotPost, HotPostWatermark, Post
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+SCOPE = 'hot'
+
+
+def log_weight(weight, moment):
+    """log2 веса события в шкале рейтинга."""
+    half_life = Constants.HOT_HALF_LIFE_HOURS * 3600
+    return math.log2(weight) + (moment - EPOCH).total_seconds() / half_life
+
+
+def log_add(first, second):
+    """log2(2 ** first + 2 ** second) без переполнения."""
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _first_id(queryset, date_field, since):
+    """Id, с которого начинается окно, если источник ещё не обрабатывался."""
+    first = queryset.filter(**{f'{date_field}__gte': since}).order_by(
+        'pk').values_list('pk', flat=True).first()
+    return first - 1 if first is not None else None
+
+
+class Ranking:
+    def __init__(self, now=None):
+        self.now = now or django_timezone.now()
+        self.window_start = self.now - timedelta(
+            days=Constants.HOT_WINDOW_DAYS)
+        self.marks = dict(
+            HotPostWatermark.objects.values_list('source', 'last_id'))
+        self.scores = defaultdict(lambda: None)
+
+    def add(self, post_id, weight, moment):
+        self.scores[post_id] = log_add(
+            self.scores[post_id], log_weight(weight, moment))
+
+    def _start(self, source, queryset, date_field):
+        if source in self.marks:
+            return self.marks[source]
+        start = _first_id(queryset, date_field, self.window_start)
+        if start is None:
+            start = queryset.order_by('-pk').values_list(
+                'pk', flat=True).first() or 0
+        return start
+
+    def _new_rows(self, source, queryset, date_field, *fields):
+        start = self._start(source, queryset, date_field)
+        rows = queryset.filter(pk__gt=start).order_by('pk').values_list(
+            'pk', *fields)
+        self.marks[source] = start
+        for row in rows.iterator(chunk_size=Constants.HOT_BATCH_SIZE):
+            self.marks[source] = row[0]
+            yield row
+
+    def collect_posts(self):
+        for post_id, pub_date in self._new_rows(
+                'post', Post.objects, 'pub_date', 'pub_date'):
+            if pub_date >= self.window_start:
+                self.add(post_id, Constants.HOT_POST_WEIGHT, pub_date)
+
+    def collect_comments(self):
+        for _, post_id, created in self._new_rows(
+                'comment', Comment.objects, 'created', 'post_id', 'created'):
+            if created >= self.window_start:
+                self.add(post_id, Constants.HOT_COMMENT_WEIGHT, created)
+
+    def collect_follows(self):
+        """Новые подписчики автора подогревают его свежие посты."""
+        if 'follow' not in self.marks:
+            # У подписок нет даты: история не учитывается, только новые.
+            self.marks['follow'] = Follow.objects.order_by('-pk').values_list(
+                'pk', flat=True).first() or 0
+            return
+        followers = Counter(
+            author_id for _, author_id in self._new_rows(
+                'follow', Follow.objects, None, 'author_id')
+        )
+        for authors in batches(sorted(followers), Constants.HOT_BATCH_SIZE):
+            posts = Post.objects.filter(
+                author_id__in=authors, pub_date__gte=self.window_start
+            ).values_list('pk', 'author_id')
+            for post_id, author_id in posts:
+                self.add(
+                    post_id,
+                    Constants.HOT_FOLLOW_WEIGHT * followers[author_id],
+                    self.now,
+                )
+
+    def save(self):
+        for ids in batches(sorted(self.scores), Constants.HOT_BATCH_SIZE):
+            existing = HotPost.objects.in_bulk(ids)
+            alive = set(Post.objects.filter(pk__in=ids).values_list(
+                'pk', flat=True))
+            changed, created = [], []
+            for post_id in ids:
+                if post_id in existing:
+                    entry = existing[post_id]
+                    entry.score = log_add(entry.score, self.scores[post_id])
+                    changed.append(entry)
+                elif post_id in alive:
+                    created.append(
+                        HotPost(post_id=post_id, score=self.scores[post_id]))
+            HotPost.objects.bulk_update(changed, ['score'])
+            HotPost.objects.bulk_create(created, ignore_conflicts=True)
+        for source, last_id in self.marks.items():
+            HotPostWatermark.objects.update_or_create(
+                source=source, defaults={'last_id': last_id})
+
+    def prune(self):
+        threshold = log_weight(Constants.HOT_MIN_WEIGHT, self.now)
+        return HotPost.objects.filter(score__lt=threshold).delete()[0]
+
+
+def update(now=None):
+    """Учитывает новые события, возвращает (обновлено, удалено)."""
+    with transaction.atomic():
+        ranking = Ranking(now)
+        ranking.collect_posts()
+        ranking.collect_comments()
+        ranking.collect_follows()
+        ranking.save()
+        pruned = ranking.prune()
+    bump_feeds(SCOPE)
+    feed_counts.forget(SCOPE)
+    return len(ranking.scores), pruned
+
+
+def rebuild(now=None):
+    """Пересчитывает рейтинг с нуля по событиям окна."""
+    with transaction.atomic():
+        HotPost.objects.all().delete()
+        HotPostWatermark.objects.all().delete()
+        return update(now)
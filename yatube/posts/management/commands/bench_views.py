@@ -0,0 +1,187 @@
+import json
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from constants.constants import Constants
+from core.metrics import percentile
+from posts.caching import GLOBAL_SCOPE, bump_feeds
+from posts.models import Group, Post, User
+
+
+class QueryCounter:
+    """execute_wrapper-счётчик: видит и запросы из потоков пула."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class NetworkLatency:
+    """execute_wrapper, изображающий сетевую СУБД: пауза на запрос."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки и число запросов страниц лент на текущей базе '
+        '(заполните её командой seed_data). Результат в JSON удобно '
+        'сравнивать между коммитами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=30)
+        parser.add_argument(
+            '--deep-page', type=int, default=None,
+            help='Номер «глубокой» страницы (по умолчанию последняя).')
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не сбрасывать кеш страниц между запросами.')
+        parser.add_argument(
+            '--latency-ms', type=float, default=0,
+            help='Добавить задержку сети к каждому SQL-запросу.')
+        parser.add_argument(
+            '--parallel', choices=('on', 'off'), default=None,
+            help='Переопределить PARALLEL_QUERIES на время замера.')
+        parser.add_argument('--json', action='store_true')
+        parser.add_argument(
+            '--output', default=None, help='Дописать JSON-строку в файл.')
+
+    def targets(self):
+        """Самые тяжёлые страницы каждой ленты в текущих данных."""
+        author = User.objects.order_by('-counters__posts_count').first()
+        reader = User.objects.order_by('-counters__following_count').first()
+        group = Group.objects.annotate(
+            total=Count('posts')).order_by('-total').first()
+        post = Post.objects.order_by('-comments_count').first()
+        if None in (author, reader, group, post):
+            raise CommandError('База пуста: сначала запустите seed_data.')
+        return {
+            'index': (reverse('posts:index'), None, Post.objects),
+            'group_posts': (
+                reverse('posts:group_list', kwargs={'slug': group.slug}),
+                None, group.posts,
+            ),
+            'profile': (
+                reverse('posts:profile', kwargs={'username': author}),
+                None, author.posts,
+            ),
+            'post_detail': (
+                reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+                None, None,
+            ),
+            'follow_index': (
+                reverse('posts:follow_index'), reader, reader.timeline,
+            ),
+        }
+
+    def pages(self, rows, deep_page):
+        if rows is None:
+            return [('shallow', '')]
+        last = max(1, -(-rows.count() // Constants.OUTPUT_OF_POSTS))
+        deep = min(deep_page or last, last)
+        return [
+            ('shallow', ''),
+            ('deep', f'?page={deep}'),
+            ('cursor', '?cursor='),
+        ]
+
+    def measure(self, client, url, runs, warm):
+        latencies, queries = [], 0
+        for _ in range(runs):
+            if not warm:
+                bump_feeds(GLOBAL_SCOPE)
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            queries = max(queries, counter.count)
+        return {
+            'runs': runs,
+            'queries': queries,
+            'latency_ms': {
+                'mean': round(statistics.mean(latencies), 2),
+                'p50': round(percentile(latencies, 0.50), 2),
+                'p95': round(percentile(latencies, 0.95), 2),
+                'p99': round(percentile(latencies, 0.99), 2),
+            },
+        }
+
+    def handle(self, *args, **options):
+        with ExitStack() as stack:
+            if options['parallel'] is not None:
+                stack.enter_context(override_settings(
+                    PARALLEL_QUERIES=options['parallel'] == 'on'))
+            if options['latency_ms']:
+                latency = NetworkLatency(options['latency_ms'] / 1000)
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(latency))
+            self.report(options)
+
+    def report(self, options):
+        results = []
+        for view, (url, viewer, rows) in self.targets().items():
+            client = Client()
+            if viewer is not None:
+                client.force_login(viewer)
+            for depth, query in self.pages(rows, options['deep_page']):
+                result = self.measure(
+                    client, url + query, options['runs'], options['warm'])
+                results.append({
+                    'view': view, 'page': depth, 'url': url + query,
+                    **result,
+                })
+        report = {
+            'revision': git_revision(),
+            'warm': options['warm'],
+            'parallel': settings.PARALLEL_QUERIES,
+            'latency_ms': options['latency_ms'],
+            'posts': Post.objects.count(),
+            'users': User.objects.count(),
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'a', encoding='utf-8') as stream:
+                stream.write(json.dumps(report) + '\n')
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for row in results:
+            latency = row['latency_ms']
+            self.stdout.write(
+                f"{row['view']:>12} {row['page']:<8} "
+                f"queries={row['queries']} p50={latency['p50']}ms "
+                f"p95={latency['p95']}ms p99={latency['p99']}ms"
+            )
@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from constants.constants import Constants
+from posts import bulk_io
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии, группы или подписки в файл.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=tuple(bulk_io.FIELDS), default='post',
+            help='Что выгружаем.',
+        )
+        parser.add_argument(
+            '--format', choices=bulk_io.FORMATS, default='jsonl',
+            help='Формат файла.',
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки (по умолчанию stdout).',
+        )
+        parser.add_argument(
+            '--after-pk', type=int, default=0,
+            help='Продолжить выгрузку после этого pk.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=Constants.IMPORT_BATCH_SIZE,
+            help='Сколько строк читать из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        model = options['model']
+        output = options['output']
+        if output == '-':
+            stream = self.stdout
+            header = options['after_pk'] == 0
+        else:
+            # Дописываем в конец: так выгрузку можно продолжить с --after-pk.
+            header = not os.path.exists(output) or not os.path.getsize(output)
+            stream = open(output, 'a', encoding='utf-8', newline='')
+        rows = bulk_io.export_rows(
+            model, options['after_pk'], options['batch_size'])
+        started = time.monotonic()
+        total, last_pk = 0, options['after_pk']
+        try:
+            for row in bulk_io.write_rows(
+                    rows, stream, options['format'], model, header):
+                total += 1
+                last_pk = row['id']
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+            elapsed = max(time.monotonic() - started, 1e-6)
+            # В stderr, чтобы не смешивать с данными при выгрузке в stdout.
+            self.stderr.write(
+                f'Выгружено строк: {total}, {total / elapsed:.0f} строк/с, '
+                f'последний pk: {last_pk}'
+            )
@@ -0,0 +1,49 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from constants.constants import Constants
+from posts import follows
+from posts.bulk_io import batches
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Подписывает пользователя на авторов из списка или отписывает от '
+        'них пачками, без запроса на каждого автора.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='Имя подписчика.')
+        parser.add_argument('authors', nargs='*', help='Имена авторов.')
+        parser.add_argument(
+            '--file', help='Файл с именами авторов, по одному в строке.')
+        parser.add_argument(
+            '--unfollow', action='store_true',
+            help='Отписать вместо подписки.')
+        parser.add_argument(
+            '--batch-size', type=int, default=Constants.BULK_FOLLOW_LIMIT,
+            help='Сколько авторов обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f'Нет пользователя {options["user"]}.')
+        usernames = list(options['authors'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as stream:
+                usernames.extend(line.strip() for line in stream)
+        usernames = [username for username in usernames if username]
+        if options['unfollow']:
+            apply = follows.unfollow_many
+        else:
+            apply = follows.follow_many
+        totals = Counter()
+        for batch in batches(usernames, options['batch_size']):
+            for username, status in apply(user, batch).items():
+                totals[status] += 1
+                self.stdout.write(f'{username}: {status}')
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{status}: {count}' for status, count in sorted(totals.items())
+        ) or 'Нет авторов.'))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from constants.constants import Constants
+from posts import bulk_io
+
+
+class Command(BaseCommand):
+    help = 'Загружает посты, комментарии, группы или подписки из файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSON Lines или CSV.')
+        parser.add_argument(
+            '--model', choices=tuple(bulk_io.FIELDS), default='post',
+            help='Что загружаем.',
+        )
+        parser.add_argument(
+            '--format', choices=bulk_io.FORMATS, default=None,
+            help='Формат файла (по умолчанию — по расширению).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=Constants.IMPORT_BATCH_SIZE,
+            help='Сколько строк сохранять за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Создавать неизвестных авторов без пароля.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+        importer = bulk_io.Importer(options['model'], options['create_users'])
+        verbose = options['verbosity'] > 1
+        started = time.monotonic()
+        total = 0
+        try:
+            with open(path, encoding='utf-8', newline='') as stream:
+                rows = bulk_io.read_rows(stream, file_format)
+                for batch in bulk_io.batches(rows, options['batch_size']):
+                    total += importer.import_batch(batch)
+                    if verbose:
+                        self.stdout.write(
+                            f'{total} строк, {self.rate(total, started)}')
+        except (OSError, ValueError, KeyError) as error:
+            # Сохранённые пачки уже в базе: сверяем их, как после полной
+            # загрузки.
+            importer.finish(options['batch_size'])
+            raise CommandError(f'Импорт прерван после {total} строк: {error}')
+        importer.finish(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total - importer.skipped}, '
+            f'пропущено: {importer.skipped}, {self.rate(total, started)}'
+        ))
+
+    def rate(self, total, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        return f'{total / elapsed:.0f} строк/с'
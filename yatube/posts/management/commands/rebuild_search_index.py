@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from constants.constants import Constants
+from posts import search
+from posts.counters import id_batches
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=Constants.SEARCH_BATCH_SIZE,
+            help='Сколько постов индексировать за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError('Полнотекстовый индекс есть только на SQLite.')
+        search.clear_index()
+        indexed = 0
+        for ids in id_batches(Post, options['batch_size']):
+            with transaction.atomic():
+                search.index_posts(
+                    Post.objects.filter(pk__in=ids).values_list('pk', 'text'))
+            indexed += len(ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано постов: {indexed}'))
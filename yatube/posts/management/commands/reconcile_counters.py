@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from constants.constants import Constants
+from posts import counters
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с данными и чинит расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=Constants.COUNTERS_BATCH_SIZE,
+            help='Сколько строк сверять за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed_users = fixed_posts = fixed_groups = 0
+        for ids in counters.id_batches(User, batch_size):
+            with transaction.atomic():
+                fixed_users += counters.reconcile_users(ids)
+        for ids in counters.id_batches(Post, batch_size):
+            with transaction.atomic():
+                fixed_posts += counters.reconcile_posts(ids)
+        for ids in counters.id_batches(Group, batch_size):
+            with transaction.atomic():
+                fixed_groups += counters.reconcile_groups(ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков пользователей: {fixed_users}, '
+            f'постов: {fixed_posts}, групп: {fixed_groups}'
+        ))
@@ -0,0 +1,124 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from constants.constants import Constants
+from posts import bulk_io
+from posts.models import Comment, Post
+
+WORDS = (
+    'котик', 'собака', 'город', 'утро', 'новости', 'дорога', 'книга',
+    'музыка', 'погода', 'работа', 'отпуск', 'море', 'лес', 'кофе', 'поезд',
+    'история', 'фотография', 'друзья', 'праздник', 'программирование',
+)
+
+
+def zipf_weights(count, skew):
+    """Накопленные веса Ципфа: первые элементы выбираются чаще всего."""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** skew for rank in range(count)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для бенчмарков: авторы с '
+        'распределением Ципфа, «тяжёлые» авторы с тысячами подписчиков, '
+        'комментарии под постами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument(
+            '--comments-per-post', type=float, default=2.0,
+            help='Среднее число комментариев под постом.')
+        parser.add_argument(
+            '--follows-per-user', type=float, default=15.0,
+            help='Среднее число подписок пользователя.')
+        parser.add_argument('--skew', type=float, default=1.1)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--batch-size', type=int, default=Constants.IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options['seed'])
+        self.options = options
+        prefix = f'seed{options["seed"]}'
+        self.usernames = [
+            f'{prefix}_user_{number}' for number in range(options['users'])]
+        self.weights = zipf_weights(options['users'], options['skew'])
+        self.slugs = [
+            f'{prefix}-group-{number}' for number in range(options['groups'])]
+        steps = (
+            ('group', self.group_rows()),
+            ('post', self.post_rows()),
+            ('comment', self.comment_rows()),
+            ('follow', self.follow_rows()),
+        )
+        for model, rows in steps:
+            self.load(model, rows)
+
+    def load(self, model, rows):
+        importer = bulk_io.Importer(model, create_users=True)
+        started = time.monotonic()
+        total = 0
+        for batch in bulk_io.batches(rows, self.options['batch_size']):
+            total += importer.import_batch(batch)
+        importer.finish(self.options['batch_size'])
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{model}: {total} строк, {total / elapsed:.0f} строк/с')
+
+    def author(self):
+        return self.rnd.choices(self.usernames, cum_weights=self.weights)[0]
+
+    def group_rows(self):
+        for slug in self.slugs:
+            yield {'slug': slug, 'title': slug, 'description': slug}
+
+    def post_rows(self):
+        first_id = (Post.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        self.post_ids = range(first_id, first_id + self.options['posts'])
+        start = timezone.now() - timedelta(days=self.options['days'])
+        step = timedelta(days=self.options['days']) / max(
+            self.options['posts'], 1)
+        for number, post_id in enumerate(self.post_ids):
+            yield {
+                'id': post_id,
+                'text': ' '.join(self.rnd.choices(WORDS, k=12)),
+                'pub_date': (start + step * number).isoformat(),
+                'author': self.author(),
+                'group': (
+                    self.rnd.choice(self.slugs)
+                    if self.slugs and self.rnd.random() < 0.5 else ''
+                ),
+            }
+
+    def comment_rows(self):
+        comment_id = (
+            Comment.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        mean = self.options['comments_per_post']
+        for post_id in self.post_ids:
+            for _ in range(int(self.rnd.expovariate(1 / mean)) if mean else 0):
+                yield {
+                    'id': comment_id,
+                    'post': post_id,
+                    'author': self.rnd.choice(self.usernames),
+                    'text': ' '.join(self.rnd.choices(WORDS, k=6)),
+                }
+                comment_id += 1
+
+    def follow_rows(self):
+        mean = self.options['follows_per_user']
+        for username in self.usernames:
+            count = int(self.rnd.expovariate(1 / mean)) if mean else 0
+            for author in {self.author() for _ in range(count)}:
+                if author != username:
+                    yield {'user': username, 'author': author}
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import hot
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет рейтинг «горячих» постов по новым постам, комментариям '
+        'и подпискам. Запускается по расписанию, например раз в минуту.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать рейтинг с нуля по событиям окна.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        update = hot.rebuild if options['rebuild'] else hot.update
+        updated, pruned = update()
+        self.stdout.write(
+            f'Обновлено постов: {updated}, удалено из рейтинга: {pruned}, '
+            f'{time.perf_counter() - started:.2f} с'
+        )
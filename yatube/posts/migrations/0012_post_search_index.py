@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from posts.stemmer import tokens
+
+    Post = apps.get_model('posts', 'Post')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5("
+            "body, tokenize = 'unicode61 remove_diacritics 0')"
+        )
+        cursor.executemany(
+            'INSERT INTO posts_search (rowid, body) VALUES (%s, %s)',
+            [
+                (post_id, ' '.join(tokens(text)))
+                for post_id, text in Post.objects.values_list(
+                    'pk', 'text').iterator()
+            ],
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_comment_page_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='hot', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('score', models.FloatField(verbose_name='Балл')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HotPostWatermark',
+            fields=[
+                ('source', models.CharField(max_length=20, primary_key=True, serialize=False, verbose_name='Источник')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Последний id')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='hotpost',
+            index=models.Index(fields=['-score', '-post'], name='hotpost_score_idx'),
+        ),
+    ]
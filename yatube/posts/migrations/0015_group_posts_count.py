@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_group_counts(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    totals = Post.objects.filter(group__isnull=False).values_list(
+        'group_id').annotate(total=Count('pk')).order_by()
+    for group_id, total in totals:
+        Group.objects.filter(pk=group_id).update(posts_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_hot_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Постов'),
+        ),
+        migrations.RunPython(fill_group_counts, migrations.RunPython.noop),
+    ]
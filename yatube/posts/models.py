@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.db import models
 
 from constants.constants import Constants
+from core.storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -10,11 +11,21 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Заголовок')
     slug = models.SlugField(unique=True, verbose_name='URL')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов',
+    )
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор со счётчиками и группа в одном запросе."""
+        return self.select_related('author__counters', 'group')
+
+
 class Post(models.Model):
 
     text = models.TextField(
@@ -43,14 +54,44 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:Constants.SUMBOLS_MAX]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: при смене группы сбрасываем обе ленты.
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        # Время правки на момент загрузки: по нему ключ старой карточки.
+        instance._loaded_updated = instance.__dict__.get('updated')
+        return instance
+
     class Meta:
         ordering = ('-pub_date', '-pk')
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -77,6 +118,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_id_idx',
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -100,3 +147,100 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'Подписчик: {self.user}, Автор: {self.author}'
+
+
+class UserCounters(models.Model):
+    """Денормализованные счётчики пользователя."""
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0, verbose_name='Постов')
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name='Подписчиков')
+    following_count = models.PositiveIntegerField(
+        default=0, verbose_name='Подписок')
+
+    def __str__(self):
+        return f'Счётчики {self.user}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписчика (fan-out on write)."""
+
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+        on_delete=models.CASCADE
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        verbose_name='Автор',
+        on_delete=models.CASCADE
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_post')]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_idx'),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'Лента {self.user}: {self.post}'
+
+
+class HotPost(models.Model):
+    """Пост в рейтинге «горячих» с накопленным баллом активности.
+
+    Балл хранится в логарифмической шкале относительно фиксированной точки
+    отсчёта (см. ``posts.hot``): старые баллы не нужно пересчитывать при
+    затухании, порядок по ``score`` и так совпадает с текущим.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name='hot',
+        verbose_name='Пост',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField(verbose_name='Балл')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-post'], name='hotpost_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post}: {self.score:.3f}'
+
+
+class HotPostWatermark(models.Model):
+    """Последний учтённый в рейтинге id по источнику событий."""
+
+    source = models.CharField(
+        max_length=20, primary_key=True, verbose_name='Источник')
+    last_id = models.BigIntegerField(default=0, verbose_name='Последний id')
+
+    def __str__(self):
+        return f'{self.source}: {self.last_id}'
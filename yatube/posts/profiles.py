@@ -0,0 +1,68 @@
+"""Сводка профиля в кеше: автор и его счётчики без запросов к базе.
+
+Сводка — это поля автора и счётчики постов, подписчиков и подписок. Она
+лежит под id автора, а имя пользователя указывает на id отдельным ключом,
+поэтому страница профиля находит автора по адресу, не обращаясь к
+``User``. Сводку сбрасывают изменения счётчиков (посты и подписки) и
+сохранение пользователя; после переименования старое имя перестаёт
+совпадать со сводкой и перечитывается из базы.
+"""
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+
+from constants.constants import Constants
+from .models import User
+
+SUMMARY_KEY = 'profile_summary:{}'
+USER_ID_KEY = 'profile_user:{}'
+USER_FIELDS = ('username', 'first_name', 'last_name')
+COUNTER_FIELDS = ('posts_count', 'followers_count', 'following_count')
+
+
+def _build(username):
+    author = User.objects.select_related('counters').filter(
+        username=username).first()
+    if author is None:
+        return None
+    try:
+        counters = author.counters
+    except ObjectDoesNotExist:
+        counters = None
+    summary = {'id': author.pk}
+    summary.update(
+        (field, getattr(author, field)) for field in USER_FIELDS)
+    summary.update(
+        (field, getattr(counters, field, 0)) for field in COUNTER_FIELDS)
+    cache.set_many(
+        {
+            USER_ID_KEY.format(username): author.pk,
+            SUMMARY_KEY.format(author.pk): summary,
+        },
+        Constants.PROFILE_SUMMARY_TIME,
+    )
+    return summary
+
+
+def summary(username):
+    """Сводка профиля по имени пользователя или None."""
+    user_id = cache.get(USER_ID_KEY.format(username))
+    if user_id is not None:
+        found = cache.get(SUMMARY_KEY.format(user_id))
+        if found is not None and found['username'] == username:
+            return found
+    return _build(username)
+
+
+def as_user(summary):
+    """Неполный ``User`` из сводки: только для чтения в шаблонах."""
+    return User(
+        pk=summary['id'],
+        **{field: summary[field] for field in USER_FIELDS},
+    )
+
+
+def invalidate(*user_ids):
+    """Сбрасывает сводки после коммита, как и ``bump_feeds``."""
+    keys = [SUMMARY_KEY.format(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
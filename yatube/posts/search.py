@@ -0,0 +1,186 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite посты индексируются в виртуальной таблице FTS5 ``posts_search``
+(rowid — id поста). В индекс кладутся не слова, а их основы из
+``posts.stemmer``, поэтому «котиков» находит «котик» и «котики». Индекс
+обновляется сигналами при сохранении и удалении поста и пересобирается
+командой ``rebuild_search_index``.
+
+Выдача сортируется по bm25, страницы выбираются по курсору
+``(rank, id)`` без OFFSET. На других СУБД поиск сводится к ``icontains``
+по словам запроса и сортировке ленты.
+"""
+from django.db import connection
+
+from .models import Post
+from .stemmer import tokens
+from .utilits import (
+    KeysetPage, KeysetPaginator, pack_cursor, unpack_cursor
+)
+
+TABLE = 'posts_search'
+
+SEARCH_SQL = f'''
+    SELECT found.rowid, found.rank
+    FROM (
+        SELECT rowid, bm25({TABLE}) AS rank
+        FROM {TABLE}
+        WHERE {TABLE} MATCH %s
+    ) AS found
+    JOIN posts_post ON posts_post.id = found.rowid
+    WHERE {{filters}}
+    ORDER BY found.rank {{direction}}, found.rowid {{direction}}
+    LIMIT %s
+'''
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def index_text(text):
+    return ' '.join(tokens(text))
+
+
+def index_post(post_id, text):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, body) VALUES (%s, %s)',
+            [post_id, index_text(text)],
+        )
+
+
+def unindex_post(post_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def index_posts(rows):
+    """Индексирует пачку пар (id, текст)."""
+    if not is_supported():
+        return
+    rows = [(post_id, index_text(text)) for post_id, text in rows]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [(post_id,) for post_id, _ in rows],
+        )
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, body) VALUES (%s, %s)', rows)
+
+
+def clear_index():
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+
+def match_expression(query):
+    """Запрос FTS5: все основы слов запроса, или None для пустого запроса."""
+    terms = list(dict.fromkeys(tokens(query)))
+    if not terms:
+        return None
+    return ' AND '.join(f'"{term}"' for term in terms)
+
+
+def filter_matching(queryset, query):
+    """Посты queryset, найденные индексом, — для админки и фильтров."""
+    expression = match_expression(query)
+    if expression is None:
+        return queryset.none()
+    column = f'{queryset.model._meta.db_table}.id'
+    return queryset.extra(
+        where=[
+            f'{column} IN (SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s)'
+        ],
+        params=[expression],
+    )
+
+
+def search_ids(query, group_id=None, author_id=None, after=None,
+               backwards=False, limit=10):
+    """Пары (id поста, rank) по релевантности, начиная после курсора."""
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    filters, params = ['1 = 1'], [expression]
+    if group_id is not None:
+        filters.append('posts_post.group_id = %s')
+        params.append(group_id)
+    if author_id is not None:
+        filters.append('posts_post.author_id = %s')
+        params.append(author_id)
+    if after is not None:
+        sign = '<' if backwards else '>'
+        filters.append(
+            f'(found.rank {sign} %s '
+            f'OR (found.rank = %s AND found.rowid {sign} %s))'
+        )
+        params.extend([after[0], after[0], after[1]])
+    sql = SEARCH_SQL.format(
+        filters=' AND '.join(filters),
+        direction='DESC' if backwards else 'ASC',
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+def _fallback_posts(query, group_id, author_id):
+    posts = Post.objects.all()
+    for word in query.split():
+        posts = posts.filter(text__icontains=word)
+    if group_id is not None:
+        posts = posts.filter(group_id=group_id)
+    if author_id is not None:
+        posts = posts.filter(author_id=author_id)
+    return posts.values_list('pk', flat=True)
+
+
+def _decode(cursor):
+    payload = unpack_cursor(cursor) if cursor else None
+    try:
+        after = (float(payload['r']), int(payload['i']))
+    except (TypeError, KeyError, ValueError):
+        return None, False
+    return after, bool(payload.get('b'))
+
+
+def search_page(query, per_page, cursor=None, group_id=None,
+                author_id=None):
+    """Страница выдачи: посты ленты в порядке релевантности."""
+    if not is_supported():
+        posts = Post.objects.filter(
+            pk__in=_fallback_posts(query, group_id, author_id)).for_feed()
+        return KeysetPaginator(posts, per_page).get_page(cursor)
+    after, backwards = _decode(cursor)
+    rows = search_ids(
+        query, group_id, author_id, after, backwards, per_page + 1)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+    posts = Post.objects.for_feed().in_bulk([post_id for post_id, _ in rows])
+    found = [posts[post_id] for post_id, _ in rows if post_id in posts]
+    if not rows:
+        return KeysetPage(found)
+    if backwards:
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, after is not None
+    first, last = rows[0], rows[-1]
+    return KeysetPage(
+        found,
+        next_cursor=(
+            pack_cursor({'r': last[1], 'i': last[0]}) if has_next else None),
+        previous_cursor=(
+            pack_cursor({'r': first[1], 'i': first[0], 'b': True})
+            if has_previous else None
+        ),
+    )
@@ -0,0 +1,165 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import (
+    counters, feed_counts, follow_graph, profiles, search, timeline
+)
+from .caching import (
+    GLOBAL_SCOPE, bump_feeds, invalidate_post_card, post_scopes
+)
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out_post(instance)
+
+
+# Счётчики подписок обновляются раньше ленты: по числу подписчиков
+# timeline решает, раскладывать ли посты автора.
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user_counters(instance.author_id, followers_count=1)
+        counters.change_user_counters(instance.user_id, following_count=1)
+        feed_counts.forget(f'follow:{instance.user_id}')
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_user_counters(instance.author_id, followers_count=-1)
+    counters.change_user_counters(instance.user_id, following_count=-1)
+    feed_counts.forget(f'follow:{instance.user_id}')
+
+
+@receiver(post_save, sender=Follow)
+def backfill_on_follow(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill_timeline(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_on_unfollow(sender, instance, **kwargs):
+    timeline.trim_timeline(instance.user_id, instance.author_id)
+
+
+# Граф подписок в кеше правится после коммита: при откате в нём
+# остались бы связи, которых нет в базе.
+@receiver(post_save, sender=Follow)
+def add_follow_edge(sender, instance, created, **kwargs):
+    if created:
+        user_id, author_id = instance.user_id, instance.author_id
+        transaction.on_commit(
+            lambda: follow_graph.add_edges(user_id, [author_id]))
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow_edge(sender, instance, **kwargs):
+    user_id, author_id = instance.user_id, instance.author_id
+    transaction.on_commit(
+        lambda: follow_graph.remove_edges(user_id, [author_id]))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    bump_feeds(f'post:{instance.pk}', *post_scopes(
+        instance.author_id,
+        instance.group_id,
+        getattr(instance, '_loaded_group_id', None),
+    ))
+
+
+@receiver(post_delete, sender=Post)
+def drop_post_card(sender, instance, **kwargs):
+    invalidate_post_card(instance)
+
+
+@receiver(post_save, sender=Post)
+def drop_edited_post_card(sender, instance, created, **kwargs):
+    # Ключ карточки включает время правки, так что прежняя версия больше
+    # не показывается; удаляем её, чтобы не ждать истечения срока.
+    loaded = instance.__dict__.get('_loaded_updated')
+    if not created and loaded is not None and loaded != instance.updated:
+        invalidate_post_card(instance, loaded)
+    instance._loaded_updated = instance.updated
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).values_list(
+        'author_id', 'group_id').first()
+    if post is not None:
+        bump_feeds(f'post:{instance.post_id}', *post_scopes(*post))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    bump_feeds(GLOBAL_SCOPE)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_profile(sender, instance, **kwargs):
+    bump_feeds(f'profile:{instance.author_id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    bump_feeds(f'profile:{instance.pk}')
+    profiles.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def create_user_counters(sender, instance, created, **kwargs):
+    if created:
+        counters.ensure_counters(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user_counters(instance.author_id, posts_count=1)
+        counters.change_group_posts_count(instance.group_id, 1)
+        feed_counts.shift(1, 'index')
+    elif '_loaded_group_id' in instance.__dict__:
+        loaded = instance._loaded_group_id
+        if loaded != instance.group_id:
+            counters.change_group_posts_count(loaded, -1)
+            counters.change_group_posts_count(instance.group_id, 1)
+    # Следующее сохранение того же объекта сравнивает уже с этой группой.
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_user_counters(instance.author_id, posts_count=-1)
+    counters.change_group_posts_count(instance.group_id, -1)
+    feed_counts.shift(-1, 'index')
+    timeline.forget_feed_counts(instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, **kwargs):
+    search.index_post(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post_text(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
@@ -0,0 +1,133 @@
+"""Стеммер Snowball для русского языка.
+
+Переложение алгоритма http://snowball.tartarus.org/algorithms/russian/
+stemmer.html: окончания снимаются только внутри области RV (после первой
+гласной), словообразовательные суффиксы — внутри R2.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+        'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+        'ая', 'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    (),
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+)
+SUPERLATIVE = ((), ('ейше', 'ейш'))
+DERIVATIONAL = ((), ('ость', 'ост'))
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _regions(word):
+    """Начала областей RV и R2."""
+    rv = r1 = r2 = len(word)
+    for position, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = position + 1
+            break
+    for position in range(1, len(word)):
+        if word[position - 1] in VOWELS and word[position] not in VOWELS:
+            r1 = position + 1
+            break
+    for position in range(r1 + 1, len(word)):
+        if word[position - 1] in VOWELS and word[position] not in VOWELS:
+            r2 = position + 1
+            break
+    return rv, r2
+
+
+def _strip(word, start, endings):
+    """Снимает самое длинное окончание из endings внутри word[start:].
+
+    Окончания первой группы допустимы только после «а» или «я».
+    Возвращает укороченное слово или None, если ничего не подошло.
+    """
+    after_a, plain = endings
+    best, needs_a = '', False
+    for group, ending_list in ((True, after_a), (False, plain)):
+        for ending in ending_list:
+            if (
+                len(ending) > len(best)
+                and word.endswith(ending)
+                and len(word) - len(ending) >= start
+            ):
+                best, needs_a = ending, group
+    if not best:
+        return None
+    stem = word[:-len(best)]
+    if needs_a and not (len(stem) > start and stem[-1] in 'ая'):
+        return None
+    return stem
+
+
+def _adjectival(word, start):
+    stem = _strip(word, start, ADJECTIVE)
+    if stem is None:
+        return None
+    return _strip(stem, start, PARTICIPLE) or stem
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    stemmed = _strip(word, rv, PERFECTIVE_GERUND)
+    if stemmed is None:
+        stemmed = _strip(word, rv, REFLEXIVE) or word
+        stemmed = (
+            _adjectival(stemmed, rv)
+            or _strip(stemmed, rv, VERB)
+            or _strip(stemmed, rv, NOUN)
+            or stemmed
+        )
+    if stemmed.endswith('и') and len(stemmed) - 1 >= rv:
+        stemmed = stemmed[:-1]
+    stemmed = _strip(stemmed, r2, DERIVATIONAL) or stemmed
+    if stemmed.endswith('нн') and len(stemmed) - 2 >= rv:
+        return stemmed[:-1]
+    superlative = _strip(stemmed, rv, SUPERLATIVE)
+    if superlative is not None:
+        stemmed = superlative
+        if stemmed.endswith('нн') and len(stemmed) - 2 >= rv:
+            stemmed = stemmed[:-1]
+        return stemmed
+    if stemmed.endswith('ь') and len(stemmed) - 1 >= rv:
+        return stemmed[:-1]
+    return stemmed
+
+
+def tokens(text):
+    """Основы слов текста в исходном порядке."""
+    return [stem(word) for word in WORD_RE.findall(text.lower())]
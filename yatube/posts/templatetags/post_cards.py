@@ -0,0 +1,46 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from constants.constants import Constants
+from core import metrics
+from posts import thumbnails
+from posts.caching import post_card_key, skip_page_cache
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Карточка поста из кеша фрагментов; рендерится только при промахе."""
+    key = post_card_key(post)
+    html = cache.get(key)
+    if html is None:
+        metrics.incr('post_card_cache_misses')
+        html = render_to_string('includes/post_card.html', {'post': post})
+        if thumbnails.shows_placeholder(post.image, 'card'):
+            # С заглушкой вместо миниатюры не кешируем ни карточку,
+            # ни страницу целиком: после сборки или повтора её сменит
+            # картинка.
+            skip_page_cache(getattr(context, 'request', None))
+        else:
+            cache.set(key, html, Constants.POST_CARD_CACHE_TIME)
+    else:
+        metrics.incr('post_card_cache_hits')
+    return mark_safe(html)
+
+
+@register.simple_tag(takes_context=True)
+def image_variants(context, image, usage):
+    """Готовые миниатюры картинки или None; недостающие ставит в очередь.
+
+    Страницу с заглушкой не кешируют, как и карточку в ``post_card``.
+    """
+    if not image:
+        return None
+    found = thumbnails.ready_variants(image, usage)
+    if found is None:
+        thumbnails.enqueue(image.name)
+        skip_page_cache(getattr(context, 'request', None))
+    return found
@@ -0,0 +1,39 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Post, User
+
+
+class BenchCommandsTest(TestCase):
+    """Генератор данных и замер лент на маленьком наборе."""
+
+    def test_seed_data_builds_consistent_graph(self):
+        """seed_data создаёт посты, комментарии и подписки со счётчиками."""
+        call_command(
+            'seed_data', users=6, groups=2, posts=40, seed=3,
+            stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertTrue(Comment.objects.exists())
+        self.assertTrue(Follow.objects.exists())
+        author = User.objects.order_by('-counters__posts_count').first()
+        self.assertEqual(
+            author.counters.posts_count, author.posts.count())
+
+    def test_bench_views_reports_json(self):
+        """bench_views отдаёт задержки и число запросов по каждой ленте."""
+        call_command(
+            'seed_data', users=6, groups=2, posts=40, seed=3,
+            stdout=StringIO())
+        out = StringIO()
+        call_command('bench_views', runs=2, json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        views = {row['view'] for row in report['results']}
+        self.assertEqual(views, {
+            'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+        })
+        for row in report['results']:
+            self.assertIn('p95', row['latency_ms'])
+            self.assertGreater(row['queries'], 0)
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .. import search
+from ..models import (
+    Comment, Follow, Group, Post, TimelineEntry, User, UserCounters
+)
+
+
+class BulkImportExportTest(TestCase):
+    """Выгрузка и загрузка данных пачками без потери связей и дат."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='exported_author')
+        self.reader = User.objects.create_user(username='exported_reader')
+        self.group = Group.objects.create(
+            title='Выгрузка', slug='export', description='Описание')
+        self.pub_date = datetime(2020, 5, 17, 12, 30, tzinfo=timezone.utc)
+        self.post = Post.objects.create(
+            author=self.author, text='Старый котик', group=self.group)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=self.pub_date)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def export(self, model, file_format):
+        path = self.path(f'{model}.{file_format}')
+        call_command(
+            'export_posts', model=model, format=file_format, output=path,
+            stderr=StringIO(),
+        )
+        return path
+
+    def test_round_trip(self):
+        """Выгруженное загружается обратно в пустую базу."""
+        for file_format in ('jsonl', 'csv'):
+            with self.subTest(format=file_format):
+                paths = [
+                    self.export(model, file_format)
+                    for model in ('group', 'post', 'comment', 'follow')
+                ]
+                User.objects.all().delete()
+                Group.objects.all().delete()
+                for path, model in zip(
+                        paths, ('group', 'post', 'comment', 'follow')):
+                    call_command(
+                        'import_posts', path, model=model, create_users=True,
+                        batch_size=1, stdout=StringIO(),
+                    )
+                    os.remove(path)
+                post = Post.objects.get(text='Старый котик')
+                self.assertEqual(post.pk, self.post.pk)
+                self.assertEqual(post.pub_date, self.pub_date)
+                self.assertEqual(post.group.slug, 'export')
+                self.assertEqual(post.comments_count, 1)
+                author = User.objects.get(username='exported_author')
+                reader = User.objects.get(username='exported_reader')
+                counters = UserCounters.objects.get(user=author)
+                self.assertEqual(counters.posts_count, 1)
+                self.assertEqual(counters.followers_count, 1)
+                self.assertTrue(TimelineEntry.objects.filter(
+                    user=reader, post=post).exists())
+                self.assertIn(post, search.search_page('котики', 10))
+
+    def test_export_resumes_after_pk(self):
+        """Выгрузку можно продолжить с последнего pk."""
+        second = Post.objects.create(author=self.author, text='Новый пост')
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'export_posts', after_pk=self.post.pk, stdout=stdout,
+            stderr=stderr,
+        )
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn(f'"id": {second.pk}', lines[0])
+        self.assertIn(f'последний pk: {second.pk}', stderr.getvalue())
+
+    def test_import_skips_unknown_authors(self):
+        """Без --create-users строки с неизвестными авторами пропускаются."""
+        path = self.path('unknown.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write('{"text": "Чужой", "author": "nobody"}\n')
+        stdout = StringIO()
+        call_command('import_posts', path, stdout=stdout)
+        self.assertIn('пропущено: 1', stdout.getvalue())
+        self.assertFalse(Post.objects.filter(text='Чужой').exists())
+
+    def test_broken_import_reconciles_saved_batches(self):
+        """Пачки до испорченной строки остаются и сверяются со счётчиками."""
+        path = self.path('broken.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                '{"text": "Первый", "author": "exported_author"}\n'
+                '{"text": \n'
+                '{"text": "Третий", "author": "exported_author"}\n'
+            )
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_posts', path, batch_size=1, stdout=StringIO())
+        self.assertTrue(Post.objects.filter(text='Первый').exists())
+        self.assertFalse(Post.objects.filter(text='Третий').exists())
+        counters = UserCounters.objects.get(user=self.author)
+        self.assertEqual(counters.posts_count, 2)
@@ -1,8 +1,14 @@
 from django.core.cache import cache
+from django.db import transaction
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from ..models import Post, User
+from core import metrics
+from core.tests.utils import run_on_commit
+from ..caching import (
+    LOCK_KEY, _page_key, bump_feeds, feed_versions, post_card_key
+)
+from ..models import Comment, Group, Post, User
 
 
 class TestCache(TestCase):
@@ -13,6 +19,7 @@ class TestCache(TestCase):
 
     def setUp(self):
         self.guest_client_cache = Client()
+        cache.clear()
 
     def test_cahce(self):
         'тест для проверки кеширования главной страницы'
@@ -21,19 +28,120 @@ class TestCache(TestCase):
             text='Тестовый текст1_cache',
         )
         response = self.guest_client_cache.get(reverse('posts:index'))
-        self.assertTrue(
-            Post.objects.filter(
-                text='Тестовый текст1_cache',
-            ).exists()
-        )
-        self.post.delete()
+        with self.assertNumQueries(0):
+            response_cached = self.guest_client_cache.get(
+                reverse('posts:index'))
+        self.assertEqual(response.content, response_cached.content)
+        with run_on_commit():
+            self.post.delete()
         self.assertFalse(
             Post.objects.filter(
                 text='Тестовый текст1_cache',
             ).exists()
         )
         response_new = self.guest_client_cache.get(reverse('posts:index'))
-        self.assertEqual(response.content, response_new.content)
-        cache.clear()
-        response_new_2 = self.guest_client_cache.get(reverse('posts:index'))
-        self.assertNotEqual(response.content, response_new_2.content)
+        self.assertNotEqual(response.content, response_new.content)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден на главной, в группе и в профиле."""
+        group = Group.objects.create(
+            title='Кеш', slug='cache_slug', description='Описание')
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            self.guest_client_cache.get(url)
+        with run_on_commit():
+            Post.objects.create(
+                author=self.user, text='Свежий пост', group=group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client_cache.get(url)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_bump_waits_for_commit(self):
+        """Версия ленты меняется только после коммита транзакции."""
+        version = feed_versions('index')
+        with run_on_commit():
+            with transaction.atomic():
+                bump_feeds('index')
+                self.assertEqual(feed_versions('index'), version)
+            self.assertEqual(feed_versions('index'), version)
+        self.assertNotEqual(feed_versions('index'), version)
+
+    def test_stale_page_served_while_rebuilding(self):
+        """Пока страницу пересобирает другой воркер, отдаётся старая."""
+        response = self.guest_client_cache.get(reverse('posts:index'))
+        bump_feeds('index')
+        request = response.wsgi_request
+        cache.add(LOCK_KEY.format(_page_key(request, 'index')), True)
+        with self.assertNumQueries(0):
+            response_stale = self.guest_client_cache.get(
+                reverse('posts:index'))
+        self.assertEqual(response.content, response_stale.content)
+
+    def test_post_card_fragment_cache(self):
+        """Карточка кешируется и сбрасывается при редактировании поста."""
+        post = Post.objects.create(author=self.user, text='Карточка')
+        client = Client()
+        client.force_login(self.user)
+        before = metrics.snapshot()
+        self.guest_client_cache.get(reverse('posts:index'))
+        self.assertIsNotNone(cache.get(post_card_key(post)))
+        client.get(reverse('posts:index'))
+        after = metrics.snapshot()
+        self.assertEqual(
+            after['post_card_cache_hits'],
+            before.get('post_card_cache_hits', 0) + 1,
+        )
+        old_key = post_card_key(post)
+        with run_on_commit():
+            client.post(
+                reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+                data={'text': 'Карточка после правки'},
+            )
+        self.assertIsNone(cache.get(old_key))
+        response = self.guest_client_cache.get(reverse('posts:index'))
+        self.assertContains(response, 'Карточка после правки')
+
+    def test_unchanged_feed_returns_304(self):
+        """Неизменившаяся лента отвечает 304 без запросов к базе."""
+        Post.objects.create(author=self.user, text='Условный запрос')
+        url = reverse('posts:index')
+        response = self.guest_client_cache.get(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client_cache.get(
+                url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with run_on_commit():
+            Post.objects.create(author=self.user, text='Новый пост')
+        response = self.guest_client_cache.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_detail_etag_follows_comments(self):
+        """Новый комментарий меняет ETag страницы поста."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertEqual(
+            client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        guest_etag = self.guest_client_cache.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client_cache.get(
+                url, HTTP_IF_NONE_MATCH=guest_etag)
+        self.assertEqual(response.status_code, 304)
+        with run_on_commit():
+            Comment.objects.create(post=post, author=self.user, text='Ответ')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Ответ')
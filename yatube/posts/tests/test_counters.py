@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User, UserCounters
+
+
+class CountersTest(TestCase):
+    """Денормализованные счётчики следуют за данными."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counted_author')
+        cls.reader = User.objects.create_user(username='counted_reader')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_counters_follow_writes(self):
+        """Посты, комментарии и подписки меняют счётчики в обе стороны."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'Комментарий'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.reader).following_count, 0)
+        Comment.objects.filter(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.counters(self.author).posts_count, 0)
+
+    def test_reconcile_counters(self):
+        """Команда сверки чинит разошедшиеся и недостающие счётчики."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserCounters.objects.filter(user=self.author).update(
+            posts_count=7, followers_count=0)
+        UserCounters.objects.filter(user=self.reader).delete()
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        author = self.counters(self.author)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_group_posts_count(self):
+        """Счётчик группы следует за созданием, удалением и сменой группы."""
+        first = Group.objects.create(title='Первая', slug='first')
+        second = Group.objects.create(title='Вторая', slug='second')
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=first)
+        first.refresh_from_db()
+        self.assertEqual(first.posts_count, 1)
+        post.group = second
+        post.save()
+        post.save()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.posts_count, second.posts_count), (0, 1))
+        Post.objects.get(pk=post.pk).delete()
+        second.refresh_from_db()
+        self.assertEqual(second.posts_count, 0)
+        Post.objects.create(author=self.author, text='Пост', group=first)
+        Group.objects.filter(pk=first.pk).update(posts_count=9)
+        call_command('reconcile_counters', stdout=StringIO())
+        first.refresh_from_db()
+        self.assertEqual(first.posts_count, 1)
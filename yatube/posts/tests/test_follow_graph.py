@@ -0,0 +1,114 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import run_on_commit
+from .. import follow_graph, follows
+from ..models import Follow, User
+
+
+class FollowGraphTest(TestCase):
+    """Граф подписок в кеше и подсказки «кого почитать»."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('anna', 'boris', 'vera', 'gleb', 'dina')
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def pk(self, name):
+        return self.users[name].pk
+
+    def follow(self, user, *authors):
+        with run_on_commit():
+            for author in authors:
+                Follow.objects.create(
+                    user=self.users[user], author=self.users[author])
+
+    def test_graph_follows_changes(self):
+        """Закешированные массивы правятся сигналами, а не перечитываются."""
+        self.follow('anna', 'boris')
+        self.assertTrue(
+            follow_graph.is_following(self.pk('anna'), self.pk('boris')))
+        self.assertEqual(
+            list(follow_graph.followers(self.pk('vera'))), [])
+        self.follow('anna', 'vera')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(follow_graph.following(self.pk('anna'))),
+                sorted([self.pk('boris'), self.pk('vera')]),
+            )
+            self.assertEqual(
+                list(follow_graph.followers(self.pk('vera'))),
+                [self.pk('anna')],
+            )
+        with run_on_commit():
+            Follow.objects.filter(author=self.users['boris']).delete()
+            follows.follow_many(self.users['anna'], ['gleb'])
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                follow_graph.is_following(self.pk('anna'), self.pk('boris')))
+            self.assertTrue(
+                follow_graph.is_following(self.pk('anna'), self.pk('gleb')))
+
+    def test_signals_wait_for_commit(self):
+        """Откатившаяся подписка не попадает в граф."""
+        self.assertEqual(list(follow_graph.following(self.pk('anna'))), [])
+        with run_on_commit():
+            try:
+                with transaction.atomic():
+                    Follow.objects.create(
+                        user=self.users['anna'], author=self.users['boris'])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(
+            follow_graph.is_following(self.pk('anna'), self.pk('boris')))
+
+    def test_bulk_changes_wait_for_commit(self):
+        """Откат массовой подписки не оставляет в графе лишних связей."""
+        self.follow('anna', 'vera')
+        self.assertFalse(
+            follow_graph.is_following(self.pk('anna'), self.pk('boris')))
+        with run_on_commit():
+            try:
+                with transaction.atomic():
+                    follows.follow_many(self.users['anna'], ['boris'])
+                    follows.unfollow_many(self.users['anna'], ['vera'])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(
+            follow_graph.is_following(self.pk('anna'), self.pk('boris')))
+        self.assertTrue(
+            follow_graph.is_following(self.pk('anna'), self.pk('vera')))
+        with run_on_commit():
+            follows.unfollow_many(self.users['anna'], ['vera'])
+        self.assertFalse(
+            follow_graph.is_following(self.pk('anna'), self.pk('vera')))
+
+    def test_suggestions(self):
+        """Подсказки ранжируются по числу общих подписок."""
+        self.follow('anna', 'boris', 'vera')
+        self.follow('boris', 'gleb', 'dina')
+        self.follow('vera', 'gleb', 'anna', 'boris')
+        self.assertEqual(
+            follow_graph.suggestions(self.pk('anna')),
+            [(self.pk('gleb'), 2), (self.pk('dina'), 1)],
+        )
+        client = Client()
+        client.force_login(self.users['anna'])
+        response = client.get(reverse('posts:follow_suggestions'))
+        self.assertEqual(response.json()['suggestions'], [
+            {'username': 'gleb', 'mutual': 2},
+            {'username': 'dina', 'mutual': 1},
+        ])
+        response = client.get(
+            reverse('posts:follow_suggestions') + '?format=html')
+        self.assertContains(response, 'общих подписок: 2')
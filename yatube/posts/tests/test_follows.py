@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows
+from ..models import Follow, Post, TimelineEntry, User, UserCounters
+
+
+class BulkFollowTest(TestCase):
+    """Массовые подписки и отписки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='bulk_reader')
+        cls.authors = [
+            User.objects.create_user(username=f'bulk_author_{number}')
+            for number in range(6)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def names(self, authors):
+        return [author.username for author in authors]
+
+    def test_follow_and_unfollow_results(self):
+        """Итог по каждому имени, счётчики и лента как при одиночной
+        подписке."""
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        response = self.client.post(reverse('posts:follow_bulk'), {
+            'usernames': ' '.join(
+                self.names(self.authors[:3]) + ['bulk_reader', 'nobody']),
+        })
+        self.assertEqual(response.json()['results'], {
+            'bulk_author_0': follows.ALREADY_FOLLOWING,
+            'bulk_author_1': follows.FOLLOWED,
+            'bulk_author_2': follows.FOLLOWED,
+            'bulk_reader': follows.SELF,
+            'nobody': follows.NOT_FOUND,
+        })
+        counters = UserCounters.objects.get(user=self.reader)
+        self.assertEqual(counters.following_count, 3)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.authors[1]).followers_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3)
+        response = self.client.post(reverse('posts:follow_bulk'), {
+            'usernames': 'bulk_author_1, bulk_author_5',
+            'unfollow': 'on',
+        })
+        self.assertEqual(response.json()['results'], {
+            'bulk_author_1': follows.UNFOLLOWED,
+            'bulk_author_5': follows.NOT_FOLLOWING,
+        })
+        self.assertFalse(Follow.objects.filter(
+            user=self.reader, author=self.authors[1]).exists())
+        self.assertEqual(
+            UserCounters.objects.get(user=self.reader).following_count, 2)
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader, author=self.authors[1]).exists())
+
+    def test_queries_do_not_grow_with_authors(self):
+        """Число запросов не зависит от числа авторов."""
+        with CaptureQueriesContext(connection) as few:
+            follows.follow_many(self.reader, self.names(self.authors[:2]))
+        with CaptureQueriesContext(connection) as many:
+            follows.follow_many(self.reader, self.names(self.authors[2:]))
+        self.assertEqual(len(few), len(many))
+        with CaptureQueriesContext(connection) as removed:
+            follows.unfollow_many(self.reader, self.names(self.authors))
+        deletes = [
+            query for query in removed.captured_queries
+            if query['sql'].startswith('DELETE FROM "posts_follow"')
+        ]
+        self.assertEqual(len(deletes), 1)
+
+    def test_bulk_endpoint_validation(self):
+        """Пустой список и GET-запрос отклоняются."""
+        url = reverse('posts:follow_bulk')
+        self.assertEqual(self.client.post(url, {}).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_follow_users_command(self):
+        """Команда печатает итог по каждому автору."""
+        out = StringIO()
+        call_command(
+            'follow_users', 'bulk_reader', 'bulk_author_3', 'nobody',
+            batch_size=1, stdout=out,
+        )
+        self.assertIn('bulk_author_3: followed', out.getvalue())
+        self.assertIn('nobody: not_found', out.getvalue())
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.authors[3]).exists())
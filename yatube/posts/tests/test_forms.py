@@ -1,4 +1,5 @@
 from http import HTTPStatus
+import hashlib
 import tempfile
 import shutil
 
@@ -167,10 +168,11 @@ class FormTest(TestCase):
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertEqual(Post.objects.count(), tasks_count + 1)
+        digest = hashlib.sha256(small_gif).hexdigest()
         self.assertTrue(
             Post.objects.filter(
                 text='Тестовый текст',
-                image='posts/small.gif'
+                image=f'posts/{digest[:2]}/{digest}.gif'
             ).exists()
         )
 
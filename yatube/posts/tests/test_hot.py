@@ -0,0 +1,87 @@
+import math
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import hot
+from ..models import Comment, Follow, HotPost, HotPostWatermark, Post, User
+
+
+class HotPostsTest(TestCase):
+    """Рейтинг «горячих» постов считается по новым событиям и затухает."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='hot_author')
+        self.reader = User.objects.create_user(username='hot_reader')
+        self.old = Post.objects.create(author=self.author, text='Старый')
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        self.quiet = Post.objects.create(author=self.author, text='Тихий')
+        self.busy = Post.objects.create(author=self.author, text='Обсуждаемый')
+        self.comment(self.busy, 2)
+
+    def comment(self, post, count):
+        for _ in range(count):
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий')
+
+    def ranking(self):
+        return list(HotPost.objects.order_by(
+            '-score', '-pk').values_list('post_id', flat=True))
+
+    def test_log_add(self):
+        self.assertAlmostEqual(hot.log_add(3, 3), 4)
+        self.assertAlmostEqual(hot.log_add(None, 2.5), 2.5)
+        self.assertAlmostEqual(hot.log_add(10, 0), math.log2(1025))
+
+    def test_rebuild_ranks_window_by_activity(self):
+        """Комментарии поднимают пост, посты вне окна не попадают."""
+        hot.rebuild()
+        self.assertEqual(self.ranking(), [self.busy.pk, self.quiet.pk])
+
+    def test_update_is_incremental(self):
+        """Повторный запуск учитывает только новые события."""
+        hot.rebuild()
+        scores = dict(HotPost.objects.values_list('post_id', 'score'))
+        hot.update()
+        self.assertEqual(
+            dict(HotPost.objects.values_list('post_id', 'score')), scores)
+        self.comment(self.quiet, 3)
+        hot.update()
+        self.assertEqual(self.ranking(), [self.quiet.pk, self.busy.pk])
+        last_comment = Comment.objects.order_by('-pk').first()
+        self.assertEqual(
+            HotPostWatermark.objects.get(source='comment').last_id,
+            last_comment.pk,
+        )
+
+    def test_new_followers_warm_recent_posts(self):
+        hot.rebuild()
+        before = HotPost.objects.get(post=self.quiet).score
+        Follow.objects.create(user=self.reader, author=self.author)
+        hot.update()
+        self.assertGreater(HotPost.objects.get(post=self.quiet).score, before)
+
+    def test_faded_posts_are_pruned(self):
+        hot.rebuild()
+        later = timezone.now() + timedelta(days=30)
+        self.assertEqual(hot.update(now=later), (0, 2))
+        self.assertFalse(HotPost.objects.exists())
+
+    def test_hot_page(self):
+        """Страница /hot/ выводит посты в порядке рейтинга."""
+        hot.rebuild()
+        response = self.client.get(reverse('posts:hot'))
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.busy.pk, self.quiet.pk],
+        )
+        response = self.client.get(reverse('posts:hot') + '?cursor=')
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.busy.pk, self.quiet.pk],
+        )
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import run_on_commit
+from .. import profiles
+from ..caching import bump_feeds
+from ..models import Follow, Post, User
+
+
+class ProfileSummaryTest(TestCase):
+    """Сводка профиля в кеше и её сброс."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='summary_author')
+        cls.reader = User.objects.create_user(username='summary_reader')
+        for number in range(3):
+            Post.objects.create(author=cls.author, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def url(self, username='summary_author'):
+        return reverse('posts:profile', kwargs={'username': username})
+
+    def test_hot_profile_queries(self):
+        """Закешированную страницу отдают без запросов, а после сброса
+        версии ленты хватает одного запроса за постами."""
+        response = self.client.get(self.url())
+        self.assertEqual(response.context['posts_count'], 3)
+        with self.assertNumQueries(0):
+            self.client.get(self.url())
+        with run_on_commit():
+            bump_feeds(f'profile:{self.author.pk}')
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url())
+        self.assertEqual(response.context['author'], self.author)
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_summary_invalidation(self):
+        """Посты, подписки и переименование сбрасывают сводку."""
+        self.assertEqual(profiles.summary('summary_author')['posts_count'], 3)
+        with run_on_commit():
+            Post.objects.create(author=self.author, text='Ещё пост')
+            Follow.objects.create(user=self.reader, author=self.author)
+        summary = profiles.summary('summary_author')
+        self.assertEqual(summary['posts_count'], 4)
+        self.assertEqual(summary['followers_count'], 1)
+        self.assertEqual(
+            profiles.summary('summary_reader')['following_count'], 1)
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'renamed_author'
+        with run_on_commit():
+            author.save()
+        self.assertIsNone(profiles.summary('summary_author'))
+        self.assertEqual(self.client.get(self.url()).status_code, 404)
+        self.assertEqual(
+            self.client.get(self.url('renamed_author')).status_code, 200)
@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class QueryBudgetTest(TestCase):
+    """Число запросов страницы не зависит от количества постов на ней."""
+
+    BUDGETS = {
+        'posts:index': 2,
+        'posts:group_list': 3,
+        'posts:profile': 3,
+        'posts:follow_index': 5,
+        'posts:post_detail': 2,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Бюджет', slug='budget', description='Описание')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def add_posts(self, count):
+        for number in range(count):
+            post = Post.objects.create(
+                author=self.authors[number % len(self.authors)],
+                text=f'Пост {number}',
+                group=self.group,
+            )
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий')
+
+    def urls(self):
+        post = Post.objects.filter(author=self.authors[0]).first()
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.authors[0]}),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}),
+        }
+
+    def count_queries(self, url, login=False):
+        cache.clear()
+        if login:
+            self.client.force_login(self.reader)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.client.logout()
+        return len(queries)
+
+    def test_query_budget_is_fixed(self):
+        """Лента из 3 и из 10 постов обходится одинаковым числом запросов."""
+        self.add_posts(3)
+        small = {
+            name: self.count_queries(url, name == 'posts:follow_index')
+            for name, url in self.urls().items()
+        }
+        self.add_posts(12)
+        for name, url in self.urls().items():
+            with self.subTest(view=name):
+                queries = self.count_queries(url, name == 'posts:follow_index')
+                self.assertEqual(queries, small[name])
+                self.assertLessEqual(queries, self.BUDGETS[name])
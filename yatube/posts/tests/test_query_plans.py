@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..utilits import KeysetPaginator
+
+HOT_TABLES = (
+    'posts_post', 'posts_comment', 'posts_follow', 'posts_timelineentry')
+
+
+def query_plan(sql):
+    """План SQLite для запроса из CaptureQueriesContext.
+
+    Захваченный SQL уже содержит подставленные параметры.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    """Шаги плана с полным проходом по таблице или сортировкой в памяти."""
+    problems = []
+    for step in plan:
+        if 'TEMP B-TREE' in step:
+            problems.append(step)
+        elif step.startswith('SCAN ') and ' USING ' not in step:
+            if step.split()[1] in HOT_TABLES:
+                problems.append(step)
+    return problems
+
+
+class QueryPlanTest(TestCase):
+    """Горячие запросы лент идут по индексам, без сортировки в памяти."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='planner')
+        cls.author = User.objects.create_user(username='plan_author')
+        cls.group = Group.objects.create(
+            title='Планы', slug='plans', description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(3):
+            post = Post.objects.create(
+                author=cls.author, text=f'Пост {number}', group=cls.group)
+            Comment.objects.create(
+                post=post, author=cls.reader, text='Комментарий')
+        cls.post = post
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def captured(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return queries.captured_queries
+
+    def test_hot_paths_use_indexes(self):
+        """Ни одна страница не читает таблицы постов целиком."""
+        paginator = KeysetPaginator(Post.objects.for_feed(), 1)
+        cursor = paginator.encode_cursor(self.post)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:index') + f'?cursor={cursor}',
+            reverse('posts:hot'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            for query in self.captured(url):
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                with self.subTest(url=url, sql=query['sql']):
+                    plan = query_plan(query['sql'])
+                    self.assertEqual(plan_problems(plan), [], plan)
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Group, Post, User
+from ..stemmer import stem
+
+
+class SearchTest(TestCase):
+    """Поиск по индексу FTS5 с учётом словоформ."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='searcher')
+        cls.other = User.objects.create_user(username='other_searcher')
+        cls.group = Group.objects.create(
+            title='Котики', slug='cats', description='Описание')
+        cls.cat = Post.objects.create(
+            author=cls.author, text='Рыжий котик спит', group=cls.group)
+        cls.cats = Post.objects.create(
+            author=cls.other, text='Много котиков и котики повсюду')
+        cls.dog = Post.objects.create(author=cls.author, text='Собака лает')
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_stemmer(self):
+        """Словоформы сводятся к одной основе."""
+        for word in ('котик', 'котики', 'котиков', 'котиками'):
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), 'котик')
+
+    def test_search_finds_word_forms(self):
+        """Поиск находит словоформы, лучший результат первым."""
+        response = self.client.get(
+            reverse('posts:post_search'), {'q': 'котиков'})
+        posts = list(response.context['page_obj'])
+        self.assertEqual(posts, [self.cats, self.cat])
+
+    def test_filters(self):
+        """Выдачу можно ограничить группой и автором."""
+        filters = {
+            'group': self.group.slug,
+            'author': self.author.username,
+        }
+        for name, value in filters.items():
+            with self.subTest(filter=name):
+                response = self.client.get(
+                    reverse('posts:post_search'), {'q': 'котик', name: value})
+                self.assertEqual(
+                    list(response.context['page_obj']), [self.cat])
+
+    def test_keyset_pages(self):
+        """Страницы выдачи идут по курсору без пропусков и повторов."""
+        first = search.search_page('котик', 1)
+        second = search.search_page('котик', 1, cursor=first.next_cursor)
+        self.assertEqual(list(first) + list(second), [self.cats, self.cat])
+        self.assertFalse(second.has_next())
+        back = search.search_page('котик', 1, cursor=second.previous_cursor)
+        self.assertEqual(list(back), [self.cats])
+
+    def test_index_follows_edits(self):
+        """Правка и удаление поста сразу видны в индексе."""
+        self.dog.text = 'Собака гоняет котика'
+        self.dog.save()
+        self.assertIn(self.dog, search.search_page('котик', 10))
+        self.dog.delete()
+        self.assertNotIn(self.dog, search.search_page('котик', 10))
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через тот же индекс."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'котиками'})
+        self.assertEqual(
+            set(response.context['cl'].queryset), {self.cat, self.cats})
+
+    def test_rebuild_search_index(self):
+        """Команда пересобирает индекс с нуля."""
+        search.clear_index()
+        self.assertEqual(len(search.search_page('котик', 10)), 0)
+        call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(len(search.search_page('котик', 10)), 2)
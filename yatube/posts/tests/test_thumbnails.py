@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.tests.utils import run_on_commit
+from .. import thumbnails
+from ..caching import feed_versions, post_card_key
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    """Миниатюры собираются вне запроса, до этого показывается заглушка."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='thumbnail_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self):
+        file_obj = BytesIO()
+        Image.new('RGB', (40, 20), (200, 0, 0)).save(file_obj, 'png')
+        return SimpleUploadedFile(
+            'thumb.png', file_obj.getvalue(), content_type='image/png')
+
+    def test_placeholder_until_ready(self):
+        """Пока миниатюр нет, карточка с заглушкой не кешируется."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.upload())
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Изображение обрабатывается')
+        self.assertIsNone(cache.get(post_card_key(post)))
+        thumbnails.generate(post.image.name)
+        variants = thumbnails.ready_variants(post.image, 'card')
+        self.assertEqual(variants[-1]['type'], 'image/jpeg')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, variants[-1]['url'])
+        self.assertIsNotNone(cache.get(post_card_key(post)))
+
+    def test_post_detail_with_placeholder(self):
+        """Страницу поста с заглушкой не кешируют, а после сборки
+        миниатюр её версия меняется."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.upload())
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        guest = Client()
+        response = guest.get(url)
+        self.assertContains(response, 'Изображение обрабатывается')
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        version = feed_versions(f'post:{post.pk}')
+        with run_on_commit():
+            thumbnails.generate(post.image.name)
+        self.assertNotEqual(feed_versions(f'post:{post.pk}'), version)
+        response = guest.get(url)
+        self.assertNotContains(response, 'Изображение обрабатывается')
+        etag = response['ETag']
+        self.assertEqual(
+            guest.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_failed_placeholder_not_cached(self):
+        """После неудачной сборки заглушку тоже не кешируют: миниатюры
+        появятся при повторе."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.upload())
+        cache.set(thumbnails.FAILED_KEY.format(post.image.name), True)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Изображение обрабатывается')
+        self.assertIsNone(cache.get(post_card_key(post)))
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from constants.constants import Constants
+from ..models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(TimelineTest.reader)
+
+    def follow(self):
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+
+    def test_follow_backfills_and_new_post_fans_out(self):
+        """Подписка переносит старые посты, новый пост попадает в ленту."""
+        self.follow()
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        entries = TimelineEntry.objects.filter(user=self.reader)
+        self.assertEqual(
+            set(entries.values_list('post_id', flat=True)),
+            {self.old_post.pk, new_post.pk},
+        )
+        for query in ('', '?cursor='):
+            with self.subTest(query=query):
+                response = self.reader_client.get(
+                    reverse('posts:follow_index') + query)
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    [new_post, self.old_post],
+                )
+
+    def test_unfollow_trims_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        self.follow()
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists())
+
+    def test_heavy_author_read_on_fan_out(self):
+        """Посты авторов с большим числом подписчиков читаются при запросе."""
+        with mock.patch.object(Constants, 'FANOUT_FOLLOWERS_LIMIT', 1):
+            self.follow()
+            new_post = Post.objects.create(author=self.author, text='Новый')
+            self.assertFalse(
+                TimelineEntry.objects.filter(user=self.reader).exists())
+            response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [new_post, self.old_post])
+
+    def test_heavy_authors_use_counters(self):
+        """Тяжёлые авторы и раскладка определяются по счётчикам, без
+        COUNT(*) по подпискам."""
+        self.follow()
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(author=self.author, text='Новый')
+            self.reader_client.get(reverse('posts:follow_index'))
+        self.assertFalse(any(
+            'COUNT(' in query['sql'] and '"posts_follow"' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_author_posts_update_follow_feed_size(self):
+        """Новые и удалённые посты автора меняют число страниц ленты."""
+        self.follow()
+        url = reverse('posts:follow_index')
+        self.reader_client.get(url)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(25)
+        ]
+        response = self.reader_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 3)
+        for post in posts[:10]:
+            post.delete()
+        response = self.reader_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленту."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=mock.MagicMock())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=self.old_post).exists())
@@ -0,0 +1,124 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from constants.constants import Constants
+from core.tests.utils import run_on_commit
+from .. import uploads
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_bytes(size=(40, 20), exif=None):
+    file_obj = BytesIO()
+    image = Image.new('RGB', size, (0, 120, 0))
+    options = {'exif': exif.tobytes()} if exif is not None else {}
+    image.save(file_obj, 'jpeg', **options)
+    return file_obj.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadsTest(TestCase):
+    """Загрузка картинок: лимиты, дедупликация и обработка в фоне."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='uploader')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, content, text='С картинкой'):
+        return self.client.post(reverse('posts:post_create'), data={
+            'text': text,
+            'image': SimpleUploadedFile(
+                'photo.jpg', content, content_type='image/jpeg'),
+        })
+
+    def test_limits_reject_upload(self):
+        """Файл сверх лимита байт или пикселей не сохраняется."""
+        limits = {'UPLOAD_MAX_BYTES': 100, 'UPLOAD_MAX_PIXELS': 100}
+        for limit, value in limits.items():
+            with self.subTest(limit=limit):
+                with mock.patch.object(Constants, limit, value):
+                    response = self.create_post(image_bytes())
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.exists())
+
+    def test_duplicate_uploads_share_file(self):
+        """Одинаковые картинки ложатся в один файл."""
+        content = image_bytes()
+        self.create_post(content, 'Первый')
+        self.create_post(content, 'Второй')
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+
+    def test_form_enqueues_processing(self):
+        """Форма ставит обработку картинки в очередь после коммита."""
+        with mock.patch.object(uploads.workers, 'submit') as submit:
+            with run_on_commit():
+                self.create_post(image_bytes())
+                submit.assert_not_called()
+        post = Post.objects.get()
+        submit.assert_called_once_with(
+            f'upload:{post.image.name}', uploads.process, post.image.name)
+
+    def test_process_strips_metadata_and_downscales(self):
+        """Обработка уменьшает картинку, убирает EXIF и меняет имя файла."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        with mock.patch.object(Constants, 'UPLOAD_MAX_PIXELS', 10 ** 8), \
+                mock.patch.object(uploads.workers, 'submit'), \
+                run_on_commit():
+            self.create_post(image_bytes((300, 100), exif))
+        post = Post.objects.get()
+        old_name = post.image.name
+        with mock.patch.object(Constants, 'IMAGE_MAX_SIDE', 150), \
+                mock.patch.object(uploads.thumbnails, 'generate'):
+            uploads.process(old_name)
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(post.image.storage.exists(old_name))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (150, 50))
+            self.assertFalse(image.getexif())
+
+    def test_process_keeps_original_held_by_upload(self):
+        """Исходник не удаляется, пока его держит незакоммиченная загрузка
+        того же содержимого."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        content = image_bytes((40, 20), exif)
+        with mock.patch.object(uploads.workers, 'submit'), run_on_commit():
+            self.create_post(content)
+        name = Post.objects.get().image.name
+        storage = Post.image.field.storage
+        upload = SimpleUploadedFile('photo.jpg', content)
+        self.assertEqual(
+            storage.save(Post.image.field.upload_to + 'photo.jpg', upload),
+            name)
+        with mock.patch.object(uploads.thumbnails, 'generate'):
+            uploads.process(name)
+        self.assertNotEqual(Post.objects.get().image.name, name)
+        self.assertTrue(storage.exists(name))
+        storage.release(name)
+        self.assertTrue(storage.delete_unused(name, lambda: False))
+        self.assertFalse(storage.exists(name))
@@ -1,9 +1,16 @@
+from unittest import mock
+
 from django import forms
 from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Follow, Group, Post, User
+from constants.constants import Constants
+from .. import feed_counts
+from ..models import Comment, Follow, Group, Post, User
+from ..utilits import FeedPaginator
 
 
 class ViewsTest(TestCase):
@@ -95,6 +102,31 @@ class ViewsTest(TestCase):
         self.assertEqual(post_author, ViewsTest.user)
         self.assertEqual(post_text, 'Тестовый текст')
 
+    def test_post_comments_pages(self):
+        """Комментарии выводятся страницами, продолжение — по курсору."""
+        for number in range(25):
+            Comment.objects.create(
+                post=self.post, author=self.user, text=f'Коммент {number}')
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        first_page = response.context['comments']
+        self.assertEqual(len(first_page), 20)
+        self.assertEqual(first_page[0].text, 'Коммент 24')
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.id})
+        with CaptureQueriesContext(connection) as queries:
+            data = self.guest_client.get(
+                url, {'cursor': first_page.next_cursor}).json()
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            [f'Коммент {number}' for number in range(4, -1, -1)],
+        )
+        self.assertIsNone(data['next_cursor'])
+        response = self.guest_client.get(
+            url, {'cursor': first_page.next_cursor, 'format': 'html'})
+        self.assertContains(response, 'Коммент 0')
+        self.assertNotContains(response, 'Коммент 5')
+
     def test__post_edit_show_correct_context(self):
         """Шаблон create_post сформирован с правильным контекстом."""
         response = self.authorized_client.get(reverse(
@@ -120,6 +152,109 @@ class ViewsTest(TestCase):
         response = self.guest_client.get(reverse('posts:index') + '?page=2')
         self.assertEqual(len(response.context['page_obj']), number_of_posts)
 
+    def test_group_pages(self):
+        """Лента группы листается дальше десяти постов по счётчику группы."""
+        Post.objects.filter(pk__gt=1).update(group=self.group)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=13)
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url + '?page=2')
+        self.assertEqual(
+            [post.id for post in response.context['page_obj']], [3, 2, 1])
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+        self.assertFalse(
+            any('COUNT(' in query['sql']
+                for query in queries.captured_queries)
+        )
+        self.assertContains(response, 'href="?page=1"')
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'href="?page=2"')
+
+    def test_deep_page_rows(self):
+        """Глубокие страницы выбираются через id и сохраняют порядок."""
+        posts = Post.objects.for_feed()
+        expected = list(posts[4:8])
+        with mock.patch.object(Constants, 'DEEP_PAGE_OFFSET', 0):
+            page = FeedPaginator(posts, 4).page(2)
+        self.assertEqual(list(page), expected)
+
+    def test_cached_feed_count(self):
+        """Размер ленты берётся из кеша, отставшее число поправляется."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url + '?page=2')
+        self.assertFalse(
+            any('COUNT(' in query['sql']
+                for query in queries.captured_queries)
+        )
+        cache.clear()
+        feed_counts.store('index', 3)
+        response = self.guest_client.get(url + '?page=2')
+        page = response.context['page_obj']
+        self.assertEqual([post.id for post in page], [3, 2, 1])
+        self.assertEqual(page.paginator.num_pages, 2)
+        self.assertEqual(feed_counts.feed_count('index', None), 13)
+        cache.clear()
+        feed_counts.store('index', 100)
+        response = self.guest_client.get(url + '?page=7')
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(feed_counts.feed_count('index', None), 13)
+
+    def test_huge_page_number(self):
+        """Номер страницы за пределами ленты и OFFSET базы даёт
+        последнюю страницу, а не ошибку."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url + '?page=99999999999999999999')
+                self.assertEqual(response.status_code, 200)
+                page = response.context['page_obj']
+                self.assertEqual(page.number, page.paginator.num_pages)
+
+    def test_page_window(self):
+        """В навигации первая, последняя и соседние страницы."""
+        paginator = FeedPaginator(list(range(100)), 1)
+        self.assertEqual(
+            paginator.page_window(50),
+            [1, None, 48, 49, 50, 51, 52, None, 100],
+        )
+        self.assertEqual(paginator.page_window(2), [1, 2, 3, 4, None, 100])
+
+    def test_keyset_pages(self):
+        """Курсорная пагинация листает ленту без COUNT(*) в обе стороны."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(
+                reverse('posts:index') + '?cursor=')
+        first_page = response.context['page_obj']
+        self.assertTrue(first_page.is_keyset)
+        self.assertEqual(len(first_page), 10)
+        self.assertFalse(first_page.has_previous())
+        self.assertFalse(
+            any(query['sql'].startswith('SELECT COUNT(*)')
+                for query in queries.captured_queries)
+        )
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?cursor={first_page.next_cursor}')
+        second_page = response.context['page_obj']
+        self.assertEqual([post.id for post in second_page], [3, 2, 1])
+        self.assertFalse(second_page.has_next())
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?cursor={second_page.previous_cursor}')
+        self.assertEqual(
+            list(response.context['page_obj']), list(first_page))
+
+    def test_keyset_broken_cursor(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index') + '?cursor=broken')
+        self.assertEqual(response.context['page_obj'][0].id, 13)
+
     def test_checking_when_creating_post(self):
         '''если при создании поста указать группу,
         то этот пост появляется на главной, странице сайта,
@@ -0,0 +1,121 @@
+"""Миниатюры изображений постов, подготовленные вне цикла запроса.
+
+Размеры объявлены в ``Constants.THUMBNAIL_SIZES``: для каждого места в
+шаблонах — набор вариантов (геометрия и опции sorl). Шаблон только
+спрашивает хранилище ключей sorl, готовы ли миниатюры, и до их появления
+показывает заглушку. Генерация идёт в пуле потоков: её ставит в очередь
+``PostForm`` после коммита, а для старых картинок — первый показ.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from PIL import features
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings, settings
+from sorl.thumbnail.images import ImageFile
+
+from constants.constants import Constants
+from core import workers
+from .caching import bump_feeds
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+FAILED_KEY = 'thumbnail_failed:{}'
+CONTENT_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp',
+}
+
+
+class Backend(ThumbnailBackend):
+    def prepare_options(self, source, options):
+        """Дополняет опции так же, как get_thumbnail, до расчёта имени."""
+        options = dict(options)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def lookup(self, file_, geometry_string, **options):
+        """Готовая миниатюра из хранилища ключей или None, без генерации."""
+        source = ImageFile(file_)
+        options = self.prepare_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = Backend()
+
+
+def variants(usage):
+    """Варианты миниатюр места в шаблоне, которые умеет собрать Pillow."""
+    return [
+        (geometry, options)
+        for geometry, options in Constants.THUMBNAIL_SIZES[usage]
+        if options.get('format') != 'WEBP' or features.check('webp')
+    ]
+
+
+def ready_variants(image, usage):
+    """Адреса и типы готовых миниатюр или None, пока хоть одной нет."""
+    found = []
+    for geometry, options in variants(usage):
+        thumbnail = backend.lookup(image, geometry, **options)
+        if thumbnail is None:
+            return None
+        found.append({
+            'url': thumbnail.url,
+            'type': CONTENT_TYPES[
+                options.get('format', settings.THUMBNAIL_FORMAT)],
+        })
+    return found
+
+
+def shows_placeholder(image, usage):
+    """Вместо миниатюр будет заглушка: они ещё собираются или сборка
+    упала и ждёт повтора."""
+    return bool(image) and ready_variants(image, usage) is None
+
+
+def generate(name):
+    """Собирает все объявленные миниатюры картинки."""
+    source = ImageFile(name, Post.image.field.storage)
+    try:
+        if not source.exists():
+            logger.warning('Нет исходного изображения %s', name)
+            cache.set(
+                FAILED_KEY.format(name), True, Constants.THUMBNAIL_RETRY_TIME)
+            return
+        for usage in Constants.THUMBNAIL_SIZES:
+            for geometry, options in variants(usage):
+                backend.get_thumbnail(source, geometry, **options)
+        # Страницы постов с заглушкой устарели, даже если их успели
+        # закешировать.
+        bump_feeds(*(
+            f'post:{pk}' for pk in Post.objects.filter(
+                image=name).values_list('pk', flat=True)
+        ))
+    except Exception:
+        logger.exception('Не удалось собрать миниатюры %s', name)
+        cache.set(
+            FAILED_KEY.format(name), True, Constants.THUMBNAIL_RETRY_TIME)
+
+
+def _submit(name):
+    workers.submit(f'thumbnails:{name}', generate, name)
+
+
+def enqueue(name):
+    """Ставит генерацию в очередь после коммита текущей транзакции."""
+    if name and cache.get(FAILED_KEY.format(name)) is None:
+        transaction.on_commit(lambda: _submit(name))
@@ -0,0 +1,180 @@
+"""Материализованная лента подписок.
+
+Новый пост раскладывается в ленты подписчиков при записи (fan-out on write),
+и страница ``/follow/`` читается одним диапазоном по индексу
+``(user, -pub_date, -post)``. У авторов с числом подписчиков от
+``Constants.FANOUT_FOLLOWERS_LIMIT`` посты не раскладываются: их лента
+подмешивается при чтении (fan-out on read). Число подписчиков берётся из
+денормализованного ``UserCounters.followers_count``, а не считается.
+"""
+from django.db.models import Q
+
+from constants.constants import Constants
+from . import feed_counts
+from .models import Follow, Post, TimelineEntry, UserCounters
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=Constants.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def followers_count(author_id):
+    return UserCounters.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True).first() or 0
+
+
+def is_fanout_author(author_id):
+    return followers_count(author_id) < Constants.FANOUT_FOLLOWERS_LIMIT
+
+
+def _forget_feed_counts(user_ids):
+    feed_counts.forget(*(
+        f'{feed_counts.FOLLOW_PREFIX}{user_id}' for user_id in user_ids))
+
+
+def forget_feed_counts(author_id):
+    """Сбрасывает размеры лент подписчиков после удаления поста автора."""
+    if is_fanout_author(author_id):
+        _forget_feed_counts(Follow.objects.filter(
+            author_id=author_id).values_list('user_id', flat=True))
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    if not is_fanout_author(post.author_id):
+        return
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True))
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in followers
+    )
+    _forget_feed_counts(followers)
+
+
+def backfill_timeline(user_id, author_id):
+    """Переносит посты автора в ленту нового подписчика."""
+    if not is_fanout_author(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date')
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts.iterator()
+    )
+
+
+def _fanout_authors(author_ids):
+    """Те из author_ids, чьи посты раскладываются по лентам."""
+    heavy = UserCounters.objects.filter(
+        user_id__in=author_ids,
+        followers_count__gte=Constants.FANOUT_FOLLOWERS_LIMIT,
+    ).values_list('user_id', flat=True)
+    return set(author_ids) - set(heavy)
+
+
+def backfill_authors(user_id, author_ids):
+    """Переносит посты сразу нескольких авторов в ленту подписчика."""
+    posts = Post.objects.filter(
+        author_id__in=_fanout_authors(author_ids)
+    ).values_list('pk', 'author_id', 'pub_date')
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, author_id, pub_date in posts.iterator()
+    )
+
+
+def backfill_author(author_id):
+    """Раскладывает все посты автора по лентам его подписчиков.
+
+    Нужен, когда автор опускается ниже порога: его посты, опубликованные,
+    пока он читался через fan-out on read, иначе пропали бы из лент.
+    """
+    followers = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        backfill_timeline(user_id, author_id)
+
+
+def trim_timeline(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    if followers_count(author_id) == Constants.FANOUT_FOLLOWERS_LIMIT - 1:
+        backfill_author(author_id)
+
+
+def trim_authors(user_id, author_ids):
+    """Убирает из ленты посты нескольких авторов после отписки от них."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids).delete()
+    dropped = UserCounters.objects.filter(
+        user_id__in=author_ids,
+        followers_count=Constants.FANOUT_FOLLOWERS_LIMIT - 1,
+    ).values_list('user_id', flat=True)
+    for author_id in list(dropped):
+        backfill_author(author_id)
+
+
+def rebuild_timeline(user_id):
+    """Пересобирает ленту пользователя по текущим подпискам."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    authors = Follow.objects.filter(
+        user_id=user_id).values_list('author_id', flat=True)
+    for author_id in list(authors):
+        backfill_timeline(user_id, author_id)
+
+
+def read_authors(user):
+    """Авторы из подписок пользователя, читаемые через fan-out on read."""
+    return list(Follow.objects.filter(
+        user=user,
+        author__counters__followers_count__gte=(
+            Constants.FANOUT_FOLLOWERS_LIMIT),
+    ).values_list('author_id', flat=True))
+
+
+def follow_feed(user):
+    """Лента подписок: записи материализованной ленты или посты.
+
+    Без «тяжёлых» авторов лента — это диапазон ``TimelineEntry`` по индексу;
+    иначе материализованная часть объединяется с их постами при чтении.
+    """
+    heavy_authors = read_authors(user)
+    if not heavy_authors:
+        return TimelineEntry.objects.filter(user=user).select_related(
+            'post__author__counters', 'post__group'
+        ).order_by('-pub_date', '-post_id')
+    materialized = TimelineEntry.objects.filter(
+        user=user).values('post_id')
+    return Post.objects.filter(
+        Q(pk__in=materialized) | Q(author_id__in=heavy_authors)
+    ).for_feed()
+
+
+def as_posts(object_list):
+    """Разворачивает записи ленты в посты для шаблона."""
+    posts = []
+    for entry in object_list:
+        if isinstance(entry, TimelineEntry):
+            entry = entry.post
+        posts.append(entry)
+    return posts
@@ -0,0 +1,92 @@
+"""Обработка загруженных картинок постов в фоне.
+
+После коммита формы картинка проверяется в пуле ``core.workers``: если она
+больше ``Constants.IMAGE_MAX_SIDE`` или несёт метаданные (EXIF, XMP,
+комментарии), она пересохраняется уменьшенной и без них. Хранилище
+адресует файлы по содержимому, поэтому у обработанной картинки новое имя:
+посты переводятся на него, ленты сбрасываются, а исходник удаляется, если
+на него больше никто не ссылается и его не держит незакоммиченная загрузка
+того же содержимого. Затем собираются миниатюры.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from constants.constants import Constants
+from core import workers
+from . import thumbnails
+from .caching import bump_feeds, post_scopes
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment')
+
+
+def needs_processing(image):
+    if getattr(image, 'is_animated', False):
+        return False
+    if max(image.size) > Constants.IMAGE_MAX_SIDE:
+        return True
+    return bool(image.getexif()) or any(
+        key in image.info for key in METADATA_KEYS)
+
+
+def clean_image(image):
+    """Копия картинки без метаданных, повёрнутая по EXIF и уменьшенная."""
+    image_format = image.format
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((Constants.IMAGE_MAX_SIDE, Constants.IMAGE_MAX_SIDE))
+    output = BytesIO()
+    options = {'quality': 90} if image_format == 'JPEG' else {}
+    if 'icc_profile' in image.info:
+        options['icc_profile'] = image.info['icc_profile']
+    image.save(output, image_format, **options)
+    return output.getvalue()
+
+
+def _replace(old_name, new_name):
+    posts = list(Post.objects.filter(image=old_name).values_list(
+        'pk', 'author_id', 'group_id'))
+    Post.objects.filter(image=old_name).update(
+        image=new_name, updated=timezone.now())
+    for post_id, author_id, group_id in posts:
+        bump_feeds(f'post:{post_id}', *post_scopes(author_id, group_id))
+
+
+def process(name):
+    """Уменьшает картинку и убирает метаданные, затем собирает миниатюры."""
+    storage = Post.image.field.storage
+    with storage.open(name) as file, Image.open(file) as image:
+        image.load()
+        content = clean_image(image) if needs_processing(image) else None
+    if content is not None:
+        extension = os.path.splitext(name)[1]
+        new_name = storage.save(
+            f'{Post.image.field.upload_to}cleaned{extension}',
+            ContentFile(content),
+        )
+        if new_name != name:
+            with transaction.atomic():
+                _replace(name, new_name)
+            storage.release(new_name)
+            storage.delete_unused(
+                name, Post.objects.filter(image=name).exists)
+            name = new_name
+    thumbnails.generate(name)
+
+
+def _submit(name):
+    Post.image.field.storage.release(name)
+    workers.submit(f'upload:{name}', process, name)
+
+
+def enqueue(name):
+    """Отпускает сохранённый файл и ставит его обработку в очередь
+    после коммита."""
+    transaction.on_commit(lambda: _submit(name))
@@ -6,6 +6,7 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('hot/', views.hot_posts, name='hot'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('justpage/', views.JustStaticPage.as_view()),
     path('profile/<str:username>/', views.profile, name='profile'),
@@ -17,7 +18,19 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
+    path(
+        'follow/suggestions/',
+        views.follow_suggestions,
+        name='follow_suggestions'
+    ),
+    path('search/', views.post_search, name='post_search'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
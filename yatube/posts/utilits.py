@@ -1,7 +1,279 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from constants.constants import Constants
+from core.parallel import run_parallel
+from . import feed_counts
+
+
+def pack_cursor(payload):
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def unpack_cursor(cursor):
+    """Содержимое курсора или None, если курсор испорчен."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+class KeysetPage:
+    """Страница ленты, выбранная по курсору: без COUNT(*) и OFFSET."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage: {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Постраничный вывод по ключу сортировки (seek-метод).
+
+    Курсор хранит значения полей сортировки крайнего объекта страницы,
+    поэтому следующая страница выбирается условием ``WHERE (pub_date, pk) <
+    (...)`` по индексу, а время ответа не зависит от номера страницы.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(
+            ordering or object_list.query.order_by
+            or object_list.model._meta.ordering
+        )
+
+    def _field(self, name):
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _values(self, obj):
+        values = []
+        for order in self.ordering:
+            field = self._field(order.lstrip('-'))
+            values.append(field.value_to_string(obj))
+        return values
+
+    def encode_cursor(self, obj, backwards=False):
+        return pack_cursor({'v': self._values(obj), 'b': backwards})
+
+    def decode_cursor(self, cursor):
+        """Возвращает (значения, направление) или None для битого курсора."""
+        payload = unpack_cursor(cursor)
+        if payload is None:
+            return None
+        try:
+            values = [
+                self._field(order.lstrip('-')).to_python(value)
+                for order, value in zip(self.ordering, payload['v'])
+            ]
+        except (ValueError, KeyError, TypeError, ValidationError):
+            return None
+        if len(values) != len(self.ordering):
+            return None
+        return values, bool(payload.get('b'))
+
+    def _seek(self, values, backwards):
+        """Условие «строго после курсора» в порядке сортировки."""
+        condition = Q()
+        for position, order in enumerate(self.ordering):
+            name = order.lstrip('-')
+            descending = order.startswith('-') != backwards
+            lookup = f'{name}__{"lt" if descending else "gt"}'
+            branch = Q(**{lookup: values[position]})
+            for previous, value in zip(self.ordering[:position], values):
+                branch &= Q(**{previous.lstrip('-'): value})
+            condition |= branch
+        return condition
+
+    def _reversed_ordering(self):
+        return [
+            order[1:] if order.startswith('-') else f'-{order}'
+            for order in self.ordering
+        ]
+
+    def get_page(self, cursor=None):
+        decoded = self.decode_cursor(cursor) if cursor else None
+        backwards = bool(decoded and decoded[1])
+        queryset = self.object_list
+        if decoded:
+            queryset = queryset.filter(self._seek(*decoded))
+        ordering = self._reversed_ordering() if backwards else self.ordering
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return KeysetPage(rows)
+        if backwards:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, decoded is not None
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if has_next else None,
+            previous_cursor=(
+                self.encode_cursor(rows[0], backwards=True)
+                if has_previous else None
+            ),
+        )
+
+
+class FeedPaginator(Paginator):
+    """Paginator, который не тащит аннотации ленты в COUNT(*).
+
+    Известное заранее число объектов (например, счётчик группы) можно
+    передать в count, а для ленты с именем count_name оно берётся из
+    ``feed_counts`` — тогда COUNT(*) не выполняется. Такое число может
+    отставать от базы, поэтому ``load_page`` сверяет его с выбранными
+    строками. Глубокие страницы выбираются отложенным соединением: OFFSET
+    проходит только по индексу, а полные строки с JOIN берутся для одной
+    страницы.
+    """
+
+    def __init__(self, object_list, per_page, count=None, count_name=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_name = count_name
+        if count is not None:
+            self.count = count
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or not query.can_filter():
+            return super().count
+        if self.count_name is not None:
+            return feed_counts.feed_count(self.count_name, self.object_list)
+        return self.object_list.values('pk').order_by().count()
+
+    def fit_count(self, count):
+        """Заменяет отставшее число объектов найденным по строкам."""
+        if count == self.count:
+            return
+        self.count = count
+        self.__dict__.pop('num_pages', None)
+        if self.count_name is not None:
+            feed_counts.store(self.count_name, count)
+
+    def recount(self):
+        """Точное число объектов вместо приблизительного."""
+        self.fit_count(self.object_list.values('pk').order_by().count())
+
+    def rows(self, bottom, top):
+        """Объекты ленты с bottom по top в порядке ленты."""
+        query = getattr(self.object_list, 'query', None)
+        if (
+            bottom < Constants.DEEP_PAGE_OFFSET
+            or query is None or not query.can_filter()
+        ):
+            return list(self.object_list[bottom:top])
+        ids = list(self.object_list.values_list('pk', flat=True)[bottom:top])
+        found = self.object_list.order_by().in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+
+    def page_window(self, number):
+        """Первая, последняя и соседние с number страницы; None — пропуск."""
+        side = Constants.PAGE_WINDOW_SIDE
+        numbers = sorted({
+            1, self.num_pages,
+            *range(max(1, number - side),
+                   min(self.num_pages, number + side) + 1),
+        })
+        window, previous = [], 0
+        for current in numbers:
+            if current - previous > 1:
+                window.append(None)
+            window.append(current)
+            previous = current
+        return window
+
+    def _get_page(self, *args, **kwargs):
+        page = super()._get_page(*args, **kwargs)
+        page.window = self.page_window(page.number)
+        return page
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        return self._get_page(self.rows(bottom, top), number, self)
+
+
+def load_page(paginator, number):
+    """Страница по номеру: строки выбираются одновременно с COUNT(*).
+
+    Выбирается на одну строку больше страницы, поэтому по строкам видно,
+    есть ли следующая страница и где кончается лента; с этим сверяется
+    приблизительное число объектов. Номер за пределами ленты пересобирается
+    обычным ``get_page`` по точному числу; номер дальше приблизительного
+    конца ленты — сразу, не доходя до OFFSET.
+    """
+    try:
+        number = int(number)
+    except (TypeError, ValueError):
+        number = 1
+    if number < 1:
+        return paginator.get_page(number)
+    bottom = (number - 1) * paginator.per_page
+    top = bottom + paginator.per_page
+    if number > 1 and bottom >= paginator.count + paginator.per_page:
+        paginator.recount()
+        return paginator.get_page(number)
+    rows, count = run_parallel(
+        lambda: paginator.rows(bottom, top + 1),
+        lambda: paginator.count,
+    )
+    if len(rows) > paginator.per_page:
+        paginator.fit_count(max(count, top + 1))
+    elif rows or number == 1:
+        paginator.fit_count(bottom + len(rows))
+    else:
+        paginator.recount()
+        return paginator.get_page(number)
+    return paginator._get_page(rows[:paginator.per_page], number, paginator)
 
 
-def get_pages_paginator(request, list, pages):
-    paginator = Paginator(list, pages)
+def get_pages_paginator(request, list, pages, count=None, count_name=None):
+    query = getattr(list, 'query', None)
+    if 'cursor' in request.GET and query is not None and query.can_filter():
+        paginator = KeysetPaginator(list, pages)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = FeedPaginator(list, pages, count=count, count_name=count_name)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    return load_page(paginator, page_number)
@@ -1,18 +1,32 @@
+from functools import partial
+
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
 from django.views.generic.base import TemplateView
 
 from constants.constants import Constants
-from .forms import PostForm, CommentForm
-from .models import Follow, Group, Post, User
-from .utilits import get_pages_paginator
+from core.parallel import run_parallel
+from core.sqlite import retry_on_locked
+from . import follow_graph, follows, profiles, search, timeline
+from .caching import (
+    GLOBAL_SCOPE, cached_feed, cached_post_author, conditional_page,
+    feed_versions, remember_post_author
+)
+from .forms import BulkFollowForm, PostForm, CommentForm, SearchForm
+from .models import Comment, Follow, Group, HotPost, Post, User
+from .utilits import KeysetPaginator, get_pages_paginator
 
 
-@cache_page(Constants.CACHE_CLEARING_TIME, key_prefix='index_page')
 def index(request):
-    posts = Post.objects.select_related('group')
-    page_obj = get_pages_paginator(request, posts, Constants.OUTPUT_OF_POSTS)
+    return cached_feed(request, 'index', lambda: _index_page(request))
+
+
+def _index_page(request):
+    posts = Post.objects.for_feed()
+    page_obj = get_pages_paginator(
+        request, posts, Constants.OUTPUT_OF_POSTS, count_name='index')
     context = {
         'posts': posts,
         'title': 'Последние обновления на сайте',
@@ -22,10 +36,35 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def hot_posts(request):
+    return cached_feed(request, 'hot', lambda: _hot_page(request))
+
+
+def _hot_page(request):
+    ranking = HotPost.objects.select_related(
+        'post__author__counters', 'post__group'
+    ).order_by('-score', '-post_id')
+    page_obj = get_pages_paginator(
+        request, ranking, Constants.OUTPUT_OF_POSTS, count_name='hot')
+    page_obj.object_list = [entry.post for entry in page_obj.object_list]
+    context = {
+        'title': 'Популярные записи',
+        'page_obj': page_obj,
+        'hot': True,
+    }
+    return render(request, 'posts/hot.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()[:Constants.OUTPUT_OF_POSTS]
-    page_obj = get_pages_paginator(request, posts, Constants.OUTPUT_OF_POSTS)
+    return cached_feed(
+        request, f'group:{group.pk}', lambda: _group_page(request, group))
+
+
+def _group_page(request, group):
+    posts = group.posts.for_feed()
+    page_obj = get_pages_paginator(
+        request, posts, Constants.OUTPUT_OF_POSTS, count=group.posts_count)
     context = {
         'group': group,
         'posts': posts,
@@ -39,59 +78,151 @@ class JustStaticPage(TemplateView):
 
 
 def profile(request, username):
+    summary = profiles.summary(username)
+    if summary is None:
+        raise Http404
+    return cached_feed(
+        request,
+        f'profile:{summary["id"]}',
+        lambda: _profile_page(request, summary),
+    )
+
+
+def _profile_page(request, summary):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
     subscriber = request.user
-    profile_list = Post.objects.filter(author=author)
-    following = subscriber.is_authenticated and Follow.objects.filter(
-        user=subscriber,
-        author=author
-    )
-    page_obj = get_pages_paginator(
-        request, profile_list, Constants.OUTPUT_OF_POSTS)
+    author = profiles.as_user(summary)
+    profile_list = Post.objects.filter(author_id=author.pk).for_feed()
+    load_page = partial(
+        get_pages_paginator, request, profile_list, Constants.OUTPUT_OF_POSTS,
+        count=summary['posts_count'])
+    if subscriber.is_authenticated:
+        page_obj, following = run_parallel(
+            load_page,
+            lambda: follow_graph.is_following(subscriber.pk, author.pk),
+        )
+    else:
+        page_obj, following = load_page(), False
     context = {
         'author': author,
+        'summary': summary,
         'profile_list': profile_list,
         'page_obj': page_obj,
-        'following': following
+        'following': following,
+        'posts_count': summary['posts_count'],
     }
     return render(request, template, context)
 
 
+def post_search(request):
+    form = SearchForm(request.GET or None)
+    page_obj = None
+    if form.is_valid() and form.cleaned_data['q']:
+        group = form.cleaned_data['group']
+        author = form.cleaned_data['author']
+        page_obj = search.search_page(
+            form.cleaned_data['q'],
+            Constants.OUTPUT_OF_POSTS,
+            cursor=request.GET.get('cursor'),
+            group_id=group.pk if group else None,
+            author_id=author.pk if author else None,
+        )
+    context = {
+        'form': form,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 def post_detail(request, post_id):
+    author_id = cached_post_author(post_id)
+    post = None
+    if author_id is None:
+        # Автора нет в кеше: сам пост всё равно понадобится странице.
+        post = get_object_or_404(Post.objects.for_feed(), id=post_id)
+        author_id = remember_post_author(post)
+    version = feed_versions(
+        f'post:{post_id}', f'profile:{author_id}', GLOBAL_SCOPE)
+    return conditional_page(
+        request, version, lambda: _post_detail_page(request, post_id, post))
+
+
+def _post_detail_page(request, post_id, post=None):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
-    comment = post.comments.all()
+    cursor = request.GET.get('comments')
+    if post is None:
+        # Комментарии выбираются вместе с постом: им нужен только его id.
+        post, comments = run_parallel(
+            lambda: get_object_or_404(Post.objects.for_feed(), id=post_id),
+            lambda: _comments_page(post_id, cursor),
+        )
+    else:
+        comments = _comments_page(post_id, cursor)
     form = CommentForm()
     context = {
         'post': post,
         'form': form,
-        'comments': comment,
+        'comments': comments,
     }
     return render(request, template, context)
 
 
+def _comments_page(post_id, cursor):
+    comments = Comment.objects.filter(
+        post_id=post_id).select_related('author')
+    paginator = KeysetPaginator(
+        comments, Constants.COMMENTS_PER_PAGE, ordering=('-created', '-pk'))
+    return paginator.get_page(cursor)
+
+
+def post_comments(request, post_id):
+    """Следующая страница комментариев: JSON или HTML-фрагмент."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = _comments_page(post.pk, request.GET.get('cursor'))
+    if request.GET.get('format') == 'html':
+        return render(request, 'includes/comment_list.html', {
+            'post': post,
+            'comments': comments,
+        })
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created.isoformat(),
+            }
+            for comment in comments
+        ],
+        'next_cursor': comments.next_cursor,
+    })
+
+
 @login_required
+@retry_on_locked
 def post_create(request):
     template = 'posts/create_post.html'
     if request.method == 'POST':
         form = PostForm(
             request.POST or None,
-            files=request.FILES or None,)
+            files=request.FILES or None,
+            upload_errors=getattr(request, 'upload_errors', None),
+        )
         if form.is_valid():
-            post = form.save(commit=False)
-            post.author = request.user
-            post.save()
+            form.instance.author = request.user
+            post = form.save()
             return redirect('posts:profile', post.author)
 
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
     return render(request, template, {'form': form})
 
 
 @login_required
+@retry_on_locked
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
@@ -100,7 +231,8 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
     if form.is_valid():
         form.save()
@@ -114,6 +246,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@retry_on_locked
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -129,9 +262,11 @@ def add_comment(request, post_id):
 def follow_index(request):
     template = 'posts/follow.html'
     subscriber = request.user
-    follow_author = Post.objects.filter(author__following__user=subscriber)
+    follow_author = timeline.follow_feed(subscriber)
     page_obj = get_pages_paginator(
-        request, follow_author, Constants.OUTPUT_OF_POSTS)
+        request, follow_author, Constants.OUTPUT_OF_POSTS,
+        count_name=f'follow:{subscriber.pk}')
+    page_obj.object_list = timeline.as_posts(page_obj.object_list)
     context = {
         'page_obj': page_obj
     }
@@ -139,6 +274,49 @@ def follow_index(request):
 
 
 @login_required
+def follow_suggestions(request):
+    """Кого почитать: авторы, на которых подписаны ваши подписки."""
+    ranked = follow_graph.suggestions(
+        request.user.pk, Constants.FOLLOW_SUGGESTIONS)
+    authors = User.objects.in_bulk([author_id for author_id, _ in ranked])
+    suggestions = [
+        {'author': authors[author_id], 'mutual': mutual}
+        for author_id, mutual in ranked if author_id in authors
+    ]
+    if request.GET.get('format') == 'html':
+        return render(request, 'includes/follow_suggestions.html', {
+            'suggestions': suggestions,
+        })
+    return JsonResponse({
+        'suggestions': [
+            {
+                'username': suggestion['author'].username,
+                'mutual': suggestion['mutual'],
+            }
+            for suggestion in suggestions
+        ],
+    })
+
+
+@login_required
+@require_POST
+@retry_on_locked
+def follow_bulk(request):
+    """Подписка или отписка сразу на многих авторов, итог по каждому."""
+    form = BulkFollowForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    if form.cleaned_data['unfollow']:
+        apply = follows.unfollow_many
+    else:
+        apply = follows.follow_many
+    return JsonResponse({
+        'results': apply(request.user, form.cleaned_data['usernames']),
+    })
+
+
+@login_required
+@retry_on_locked
 def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
@@ -148,6 +326,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@retry_on_locked
 def profile_unfollow(request, username):
     subscriber = request.user
     author = get_object_or_404(User, username=username)
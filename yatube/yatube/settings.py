@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,7 +65,7 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -84,13 +86,66 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Профиль SQLite: PRAGMA для каждого соединения (core.sqlite) и время
+# жизни соединений. В production — WAL, чтобы чтение не ждало записи,
+# synchronous=NORMAL (в WAL не теряет целостность при сбое), крупные кеш
+# и mmap и ожидание блокировки вместо мгновенной ошибки.
+SQLITE_PROFILES = {
+    'development': {
+        'pragmas': {'busy_timeout': 5000},
+        'conn_max_age': 0,
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'cache_size': -64 * 1024,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'conn_max_age': 600,
+    },
+}
+
+SQLITE_PROFILE = SQLITE_PROFILES[os.getenv('SQLITE_PROFILE', 'production')]
+
+SQLITE_PRAGMAS = SQLITE_PROFILE['pragmas']
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': SQLITE_PROFILE['conn_max_age'],
+        'OPTIONS': {'timeout': 5},
     }
 }
 
+# Реплики для чтения: пути к файлам SQLite через запятую. Локально их
+# поддерживает в актуальном виде команда replicate_sqlite.
+DATABASE_REPLICAS = []
+
+for number, path in enumerate(
+        filter(None, os.getenv('SQLITE_REPLICAS', '').split(',')), 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': SQLITE_PROFILE['conn_max_age'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Независимые запросы представления — в пуле потоков (core.parallel).
+# Выигрыш заметен на сетевой СУБД; локальному SQLite это не нужно.
+PARALLEL_QUERIES = os.getenv('PARALLEL_QUERIES', '0') == '1'
+
+# Фоновые задачи (core.workers) выполнять сразу, в вызывающем потоке.
+# В тестах включено через core.testing.
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', '0') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -144,10 +199,76 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+FILE_UPLOAD_HANDLERS = [
+    'core.upload_handlers.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Двухуровневый кеш: локальный LRU процесса перед общим хранилищем.
+# Общий уровень по умолчанию — файл SQLite рядом с проектом, его видят все
+# воркеры машины; SHARED_CACHE_BACKEND и SHARED_CACHE_LOCATION задают
+# другой, например django.core.cache.backends.memcached.MemcachedCache
+# с адресом сервера. В тестах общий уровень в памяти (core.testing).
+SHARED_CACHE_LOCATION = os.getenv(
+    'SHARED_CACHE_LOCATION', os.path.join(BASE_DIR, 'shared_cache.sqlite3'))
+
+SHARED_CACHE_BACKEND = os.getenv(
+    'SHARED_CACHE_BACKEND', 'core.cache_backends.sqlite.SQLiteCache')
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache_backends.tiered.TieredCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+            'SYNC_INTERVAL': 0.5,
+        },
+    },
+    'shared': {
+        'BACKEND': SHARED_CACHE_BACKEND,
+        'LOCATION': SHARED_CACHE_LOCATION,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+TEST_RUNNER = 'core.testing.TestRunner'
+
+# Метрики в формате Prometheus на /metrics/: доступны персоналу, запросам
+# с заголовком «Authorization: Bearer <METRICS_TOKEN>» и адресам из
+# списка. За обратным прокси все запросы приходят с его адреса, поэтому
+# по умолчанию список пуст.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [
+    address for address in os.getenv('METRICS_ALLOWED_IPS', '').split(',')
+    if address
+]
+
+SLOW_REQUESTS_LOG = os.getenv(
+    'SLOW_REQUESTS_LOG', os.path.join(BASE_DIR, 'slow_requests.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_REQUESTS_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -3,7 +3,10 @@ from django.contrib import admin
 from django.conf.urls.static import static
 from django.urls import include, path
 
+from core.views import metrics_view
+
 urlpatterns = [
+    path('metrics/', metrics_view, name='metrics'),
     path('auth/', include('users.urls')),
     path('', include('posts.urls', namespace='posts')),
     path('admin/', admin.site.urls),